@@ -0,0 +1,940 @@
+"""
+Crabe Dialogue Skipper benchmark
+Drives the skipper against a simulated game screen and reports its reaction times.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from threading import Event, Thread
+from time import perf_counter, process_time, sleep
+from typing import Dict, List
+
+import numpy as np
+
+from calibration import calibrate
+from click_dispatcher import ClickDispatcher
+from constants import (STATUS_RUN, STATUS_EXIT, KEY_START, KEY_EXIT, CONTROL_START,
+                       CONTROL_STATE, GAME_UNFOCUSED)
+from control_server import ControlServer, send_command
+from dialogue_skipper import DialogueSkipper
+from font_cache import FontFamilyCache, font_file_hash
+from fake_game import (CLICK_FRAMES, FRAME_AUTOPLAY, FRAME_IDLE, FRAME_OPTION, FRAME_MULTI_OPTION,
+                       SCENARIOS, FakeGame)
+from frame_source import GAME_WINDOW_TITLE, FrameSource, ReplayFrameSource, load_frame
+from input_backend import FakeInputSink
+from overlay_process import OverlayProcess
+from pipeline import DetectionPipeline
+from screen_setup import ScreenSetup
+from session_recorder import SessionReader
+from session_stats import NullSessionStats, SessionStats, rollup
+from supervisor import FAKE_FOREGROUND_HWND, Supervisor, create_fake_backends
+from window_tracker import FakeFocusProvider, WindowFocusTracker
+
+DEFAULT_RESOLUTIONS = ['1920x1080', '2560x1440', '3840x2160', '2560x1080', '5120x1440']
+
+OPTION_SCAN_BUDGET_MS = 1.0
+
+# Slowest p99 F8 resume to first click and F12 to loop end (ms); the old
+# paused loop polled every 500 ms
+KEY_LATENCY_BUDGET_MS = 50.0
+
+# Script played in real time by the pipeline check: every dialogue lasts longer than
+# the slowest idle poll, and seconds each frame is shown
+PIPELINE_SCRIPT = [(FRAME_IDLE, 20), (FRAME_AUTOPLAY, 40), (FRAME_IDLE, 20), (FRAME_OPTION, 20),
+                   (FRAME_IDLE, 20), (FRAME_MULTI_OPTION, 20), (FRAME_IDLE, 20)]
+PIPELINE_FRAME_PERIOD = 0.025
+
+# Fade animated by the busy overlay: steps, delay between steps and Python work per step (s)
+OVERLAY_FADE_STEPS = 20
+OVERLAY_STEP_DELAY = 0.01
+OVERLAY_STEP_WORK = 0.002
+
+class NullOverlay:
+    """Status overlay stand-in that displays nothing."""
+
+    def update_status(self, status):
+        """Ignores the status."""
+
+    def show_keybindings(self):
+        """Ignores the help request."""
+
+    def show_metrics(self, text):
+        """Ignores the metrics line."""
+
+    def close(self):
+        """Nothing to close."""
+
+
+def busy_wait(seconds: float):
+    """Runs Python bytecode for a while, holding the GIL like a Tk callback."""
+    end = perf_counter() + seconds
+    while perf_counter() < end:
+        pass
+
+
+class BusyOverlay:
+    """Overlay stand-in whose fade animation costs as much Python work as a real one."""
+
+    def __init__(self):
+        """Starts the animation thread."""
+        self.restart = Event()
+        self.closed = False
+        Thread(target=self._animate, daemon=True).start()
+
+    def _animate(self):
+        """Plays a fade each time the status changes."""
+        while not self.closed:
+            if not self.restart.wait(0.1):
+                continue
+            self.restart.clear()
+            for _ in range(OVERLAY_FADE_STEPS):
+                if self.closed or self.restart.is_set():
+                    break
+                busy_wait(OVERLAY_STEP_WORK)
+                sleep(OVERLAY_STEP_DELAY)
+
+    def update_status(self, status):
+        """Restarts the fade."""
+        self.restart.set()
+
+    def show_keybindings(self):
+        """Restarts the fade."""
+        self.restart.set()
+
+    def show_metrics(self, text):
+        """Ignores the metrics line."""
+
+    def close(self):
+        """Stops the animation."""
+        self.closed = True
+
+
+class FakeKey:
+    """Key event whose string form matches a pynput key."""
+
+    def __init__(self, name: str):
+        """Initializes the key from its pynput string form."""
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class SimulatedClock:
+    """Clock advanced by hand, standing in for perf_counter."""
+
+    def __init__(self):
+        """Starts the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        """Moves the clock forward."""
+        self.now += seconds
+
+
+class VirtualScreen(FrameSource):
+    """Desktop spanning several monitors, some of them at negative coordinates."""
+
+    def __init__(self, left: int, top: int, right: int, bottom: int):
+        """Creates a black desktop covering the virtual screen bounds."""
+        self.left, self.top = left, top
+        self.pixels = np.zeros((bottom - top, right - left, 3), dtype=np.uint8)
+
+    def show(self, frame: np.ndarray, rect):
+        """Clears the desktop and draws a game frame in a window client area."""
+        left, top, right, bottom = rect
+        self.pixels[:] = 0
+        self.pixels[top - self.top:bottom - self.top, left - self.left:right - self.left] = frame
+
+    def grab(self, bbox):
+        """Crops a region given in virtual screen coordinates."""
+        left, top, right, bottom = bbox
+        return self.pixels[top - self.top:bottom - self.top, left - self.left:right - self.left]
+
+    def active_window_title(self):
+        """Focus comes from the fake focus provider."""
+        return GAME_WINDOW_TITLE
+
+
+class TimedReplayFrameSource(FrameSource):
+    """Replay showing each frame for a fixed time, like a game running on its own."""
+
+    def __init__(self, frames: List[np.ndarray], period: float):
+        """
+        Initializes the replay without starting it.
+
+        Args:
+            frames: Full-screen RGB frames, shown in order
+            period: Seconds each frame is shown
+        """
+        self.frames = frames
+        self.period = period
+        self.started = perf_counter()
+
+    def start(self):
+        """Shows the first frame."""
+        self.started = perf_counter()
+
+    def index_at(self, now: float) -> int:
+        """Returns the frame shown at a perf_counter time."""
+        return min(max(int((now - self.started) / self.period), 0), len(self.frames) - 1)
+
+    @property
+    def finished(self) -> bool:
+        """Tells if the last frame has been shown for its whole period."""
+        return perf_counter() - self.started >= len(self.frames) * self.period
+
+    def grab(self, bbox):
+        """Crops the region from the frame shown now."""
+        left, top, right, bottom = bbox
+        return self.frames[self.index_at(perf_counter())][top:bottom, left:right]
+
+    def active_window_title(self):
+        """The game stays in the foreground."""
+        return GAME_WINDOW_TITLE
+
+
+def build_skipper(screen: ScreenSetup, frames: List[np.ndarray], clock=None, overlay=None,
+                  loop: bool = False, session_stats=None):
+    """Creates a skipper wired to a replay of frames and a fake mouse."""
+    source = ReplayFrameSource(frames, loop=loop)
+    focus = WindowFocusTracker(FakeFocusProvider(GAME_WINDOW_TITLE, hwnd=1))
+    sink = FakeInputSink()
+    dispatcher = ClickDispatcher(sink, clock=clock) if clock is not None else None
+    return DialogueSkipper(screen, source, focus, sink, overlay or NullOverlay(),
+                           click_dispatcher=dispatcher,
+                           session_stats=session_stats or NullSessionStats()), sink
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Returns the p50/p95/p99 of latency samples in milliseconds."""
+    if not samples:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+    return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+
+
+def run_scenario(width: int, height: int, name: str) -> Dict:
+    """
+    Plays one scripted scenario tick by tick on a simulated clock.
+
+    Each tick advances the clock by the polling delay, so the click rate limit
+    applies as it would in real time. The detection latency is the time of a
+    tick that ends with a click. The reaction latency runs from the worst case
+    appearance of a dialogue, just after the previous tick, to its first click.
+    """
+    screen = ScreenSetup(width, height, layout_file=None)
+    frames, kinds = FakeGame(screen).render_script(SCENARIOS[name])
+    clock = SimulatedClock()
+    skipper, sink = build_skipper(screen, frames, clock)
+    skipper.status = STATUS_RUN
+
+    detect_latencies, reaction_latencies = [], []
+    false_clicks = missed = dialogues = transition_ticks = 0
+    appeared_at, answered = 0.0, False
+    interval = skipper.scheduler.min_interval
+    cpu_start, wall_start = process_time(), perf_counter()
+    for i, kind in enumerate(kinds):
+        expected = kind in CLICK_FRAMES
+        if expected and (i == 0 or kinds[i - 1] not in CLICK_FRAMES):
+            dialogues += 1
+            appeared_at, answered = clock.now - interval, False
+
+        clicks_before = len(sink.clicks)
+        start = perf_counter()
+        detected = skipper.tick()
+        elapsed = perf_counter() - start
+
+        if len(sink.clicks) > clicks_before:
+            detect_latencies.append(elapsed)
+            if not expected:
+                false_clicks += 1
+            elif not answered:
+                reaction_latencies.append(clock.now - appeared_at + elapsed)
+                answered = True
+        if expected and not answered and (i + 1 == len(kinds) or kinds[i + 1] not in CLICK_FRAMES):
+            missed += 1
+        if skipper.in_transition():
+            transition_ticks += 1
+        interval = skipper.next_interval(detected)
+        clock.advance(interval)
+    wall = perf_counter() - wall_start
+    cpu = process_time() - cpu_start
+
+    return {
+        'resolution': f'{width}x{height}',
+        'scenario': name,
+        'ticks': len(kinds),
+        'ticks_per_s': len(kinds) / wall,
+        'cpu_ms': cpu * 1000,
+        'clicks': len(sink.clicks),
+        'clicks_per_dialogue': len(sink.clicks) / dialogues if dialogues else 0.0,
+        'false_clicks': false_clicks,
+        'missed': missed,
+        'detect_ms': percentiles(detect_latencies),
+        'reaction_ms': percentiles(reaction_latencies),
+        'gate_reused': skipper.change_gate.short_circuited,
+        'transition_ticks': transition_ticks,
+        'states': skipper.game_state.report(),
+        'dispatch': skipper.dispatcher.report(),
+    }
+
+
+def replay_recording(path: str) -> Dict:
+    """Runs detection again on a session recording and compares it with the recorded decisions."""
+    reader = SessionReader(path)
+    width, height = reader.screen_size
+    skipper, _ = build_skipper(ScreenSetup(width, height, layout_file=None),
+                               [np.zeros((height, width, 3), dtype=np.uint8)])
+    if skipper.capture.bbox != reader.bbox:
+        raise ValueError(f"Recorded region {reader.bbox} does not match the current "
+                         f"layout {skipper.capture.bbox}")
+    skipper.status = STATUS_RUN
+
+    timings, mismatches, replayed = [], 0, 0
+    for record in reader:
+        if reader.state_name(record['state']) == GAME_UNFOCUSED:
+            skipper.enter_state(GAME_UNFOCUSED)
+            continue
+        buffer = reader.frame(record)
+        if buffer is None:
+            continue
+        start = perf_counter()
+        detected = skipper.detect(buffer)
+        timings.append(perf_counter() - start)
+        replayed += 1
+        mismatches += detected != bool(record['detected'])
+    return {'ticks': len(reader), 'replayed': replayed, 'mismatches': mismatches,
+            'detect_ms': percentiles(timings)}
+
+
+def measure_resume_latency(width: int, height: int, rounds: int = 20) -> Dict:
+    """Measures F8-to-first-click and F12-to-exit delays using fake key events."""
+    screen = ScreenSetup(width, height, layout_file=None)
+    frames, _ = FakeGame(screen).render_script([(FRAME_AUTOPLAY, 1)])
+    resume, exit_ = [], []
+    for _ in range(rounds):
+        skipper, sink = build_skipper(screen, frames)
+        thread = Thread(target=skipper.run, daemon=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            thread.start()
+            sleep(0.01)  # Let the loop block while paused
+
+            start = perf_counter()
+            skipper.on_press(FakeKey(KEY_START))
+            while not sink.clicks:
+                sleep(0)
+            resume.append(sink.clicks[0] - start)
+
+            start = perf_counter()
+            try:
+                skipper.on_press(FakeKey(KEY_EXIT))
+            except SystemExit:
+                pass
+            thread.join()
+            exit_.append(perf_counter() - start)
+    results = {'resume_ms': percentiles(resume), 'exit_ms': percentiles(exit_)}
+    results['within_budget'] = max(results['resume_ms']['p99'],
+                                   results['exit_ms']['p99']) < KEY_LATENCY_BUDGET_MS
+    return results
+
+
+def measure_control_api(width: int, height: int, rounds: int = 20) -> Dict:
+    """Measures the control server: state query round trip and start command to first click."""
+    screen = ScreenSetup(width, height, layout_file=None)
+    frames, _ = FakeGame(screen).render_script([(FRAME_AUTOPLAY, 1)])
+    state, start_click = [], []
+    for _ in range(rounds):
+        skipper, sink = build_skipper(screen, frames, loop=True)
+        server = ControlServer(skipper, port=0)
+        server.start()
+        thread = Thread(target=skipper.run, daemon=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            thread.start()
+            start = perf_counter()
+            send_command(server.address, CONTROL_STATE)
+            state.append(perf_counter() - start)
+
+            start = perf_counter()
+            send_command(server.address, CONTROL_START)
+            while not sink.clicks:
+                sleep(0)
+            start_click.append(sink.clicks[0] - start)
+
+            skipper.shutdown()
+            thread.join()
+            server.stop()
+    return {'state_ms': percentiles(state), 'start_to_click_ms': percentiles(start_click)}
+
+
+def answered_dialogues(clicks: List[float], source: TimedReplayFrameSource,
+                       kinds: List[str], grace: float) -> Dict[str, int]:
+    """
+    Matches clicks to the frames shown when they were sent.
+
+    A click up to grace seconds after a dialogue ended still belongs to it.
+
+    Returns:
+        Dict[str, int]: Clicks, dialogues shown, dialogues clicked at least once,
+        and clicks sent while no dialogue was shown
+    """
+    segments = [i for i, kind in enumerate(kinds)
+                if kind in CLICK_FRAMES and (i == 0 or kinds[i - 1] not in CLICK_FRAMES)]
+    answered, false_clicks = set(), 0
+    for clicked_at in clicks:
+        index = source.index_at(clicked_at)
+        if kinds[index] not in CLICK_FRAMES:
+            index = source.index_at(clicked_at - grace)
+        if kinds[index] not in CLICK_FRAMES:
+            false_clicks += 1
+            continue
+        answered.add(max(start for start in segments if start <= index))
+    return {'clicks': len(clicks), 'dialogues': len(segments), 'answered': len(answered),
+            'false_clicks': false_clicks}
+
+
+def measure_pipeline(width: int, height: int) -> Dict:
+    """
+    Plays the same frames in real time to the tick loop and to the pipeline stages.
+
+    Both modes should click every dialogue and nothing else; the pipeline
+    should drop no click. The pipeline stage latencies are reported.
+    """
+    screen = ScreenSetup(width, height, layout_file=None)
+    frames, kinds = FakeGame(screen).render_script(PIPELINE_SCRIPT)
+    results = {}
+    for mode in ('tick', 'pipeline'):
+        source = TimedReplayFrameSource(frames, PIPELINE_FRAME_PERIOD)
+        sink = FakeInputSink()
+        skipper = DialogueSkipper(screen, source,
+                                  WindowFocusTracker(FakeFocusProvider(GAME_WINDOW_TITLE, hwnd=1)),
+                                  sink, NullOverlay(), session_stats=NullSessionStats())
+        pipeline = DetectionPipeline(skipper) if mode == 'pipeline' else None
+        runner = Thread(target=pipeline.run if pipeline else skipper.run)
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner.start()
+            source.start()
+            skipper.set_status(STATUS_RUN)
+            while not source.finished:
+                sleep(PIPELINE_FRAME_PERIOD)
+            skipper.set_status(STATUS_EXIT)
+            runner.join()
+        results[mode] = answered_dialogues(sink.clicks, source, kinds, PIPELINE_FRAME_PERIOD)
+        if pipeline:
+            results[mode].update(pipeline.stats())
+    tick, pipe = results['tick'], results['pipeline']
+    results['correct'] = (pipe['answered'] == tick['answered'] == tick['dialogues'] and
+                          not pipe['false_clicks'] and not tick['false_clicks'] and
+                          not pipe['dropped']['clicks'])
+    return results
+
+
+def measure_session_stats(width: int, height: int, rounds: int = 3) -> Dict:
+    """
+    Compares tick times of the mixed scenario with session statistics off and on.
+
+    The statistics are written every 10 ms, far more often than in a session,
+    and the totals read back from the database must match the counters.
+    """
+    screen = ScreenSetup(width, height, layout_file=None)
+    frames, _ = FakeGame(screen).render_script(SCENARIOS['mixed'])
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'stats.db')
+        for mode in ('off', 'on'):
+            ticks = []
+            for _ in range(rounds):
+                stats = SessionStats(path, 0.01) if mode == 'on' else None
+                skipper, sink = build_skipper(screen, frames, SimulatedClock(),
+                                              session_stats=stats)
+                skipper.status = STATUS_RUN
+                for _ in frames:
+                    start = perf_counter()
+                    skipper.tick()
+                    ticks.append(perf_counter() - start)
+                    sleep(0.001)
+                skipper.session_stats.close()
+            results[mode] = percentiles(ticks)
+        connection = sqlite3.connect(path)
+        totals = rollup(connection, 'session', rounds)
+        connection.close()
+        results['stored'] = all(t.get('clicks', 0) == len(sink.clicks) and
+                                t.get('dialogues', 0) == stats.counters['dialogues'] and
+                                t['latency']['count'] == len(frames) for t in totals)
+    return results
+
+
+def measure_supervisor(width: int, height: int, duration: float = 2.0) -> Dict:
+    """
+    Runs two worker processes on fake windows placed apart on one simulated screen.
+
+    Both windows show an autoplay dialogue but only the first one is in the
+    foreground: its worker should click, aiming only inside its window, and
+    the other worker should not click at all.
+    """
+    screen = ScreenSetup(width, height, layout_file=None)
+    frames, _ = FakeGame(screen).render_script([(FRAME_AUTOPLAY, 1)])
+    rects = [(0, 0, width, height), (width + 100, height // 4, 2 * width + 100, height // 4 + height)]
+    desktop = np.zeros((height // 4 + height, 2 * width + 100, 3), dtype=np.uint8)
+    provider = FakeFocusProvider()
+    for hwnd, (left, top, right, bottom) in enumerate(rects, 1):
+        desktop[top:bottom, left:right] = frames[0]
+        provider.add_window(hwnd, GAME_WINDOW_TITLE, (left, top, right, bottom))
+
+    # Workers inherit the environment: no statistics database for a benchmark
+    stats_setting = os.environ.get('STATS')
+    os.environ['STATS'] = '0'
+    try:
+        supervisor = Supervisor(provider, ReplayFrameSource([desktop], loop=True),
+                                create_fake_backends, layout_file=None)
+        results = []
+        runner = Thread(target=lambda: results.extend(supervisor.run()))
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner.start()
+            try:
+                supervisor.set_status(STATUS_RUN)
+                sleep(duration)
+            finally:
+                supervisor.set_status(STATUS_EXIT)
+                runner.join()
+    finally:
+        if stats_setting is None:
+            del os.environ['STATS']
+        else:
+            os.environ['STATS'] = stats_setting
+
+    windows = []
+    for result in results:
+        left, top, right, bottom = result['window'].rect
+        windows.append({
+            'foreground': result['window'].hwnd == FAKE_FOREGROUND_HWND,
+            'clicks': result['stats']['clicks']['dispatched'],
+            'ticks': result['stats']['polling']['ticks'],
+            'moves': len(result['moves']),
+            'moves_inside': all(left <= x < right and top <= y < bottom
+                                for x, y in result['moves']),
+        })
+    return {'windows': windows, 'grabs': supervisor.capture.grabs,
+            'correct': len(windows) == len(rects) and all(
+                (w['clicks'] and w['moves'] and w['moves_inside']) if w['foreground']
+                else not (w['clicks'] or w['moves']) for w in windows)}
+
+
+def measure_window_follow(width: int, height: int, ticks: int = 20) -> Dict[str, Dict]:
+    """
+    Follows a game window from a monitor left of the primary one, then moved, then resized.
+
+    The skipper starts with the monitor size, as read from .env, and must find
+    the window size itself. In each phase the window shows an autoplay
+    dialogue: the skipper should click and aim only inside the window, and a
+    move should not rebuild the coordinates.
+    """
+    desktop = VirtualScreen(-width, -height // 5, width, height)
+    phases = [
+        ('secondary monitor', (-width + 50, 40, -width + 50 + width * 3 // 4, 40 + height * 3 // 4)),
+        ('moved', (100, 60, 100 + width * 3 // 4, 60 + height * 3 // 4)),
+        ('resized', (100, 60, 100 + width // 2, 60 + height // 2)),
+    ]
+    provider = FakeFocusProvider(GAME_WINDOW_TITLE, hwnd=1)
+    sink = FakeInputSink()
+    clock = SimulatedClock()
+    skipper = None
+    results = {}
+    for name, rect in phases:
+        left, top, right, bottom = rect
+        game_screen = ScreenSetup(right - left, bottom - top, layout_file=None)
+        desktop.show(FakeGame(game_screen).render(FRAME_AUTOPLAY), rect)
+        provider.add_window(1, GAME_WINDOW_TITLE, rect)
+        with contextlib.redirect_stdout(io.StringIO()):
+            if skipper is None:
+                skipper = DialogueSkipper(ScreenSetup(width, height, layout_file=None), desktop,
+                                          WindowFocusTracker(provider), sink, NullOverlay(),
+                                          click_dispatcher=ClickDispatcher(sink, clock=clock),
+                                          session_stats=NullSessionStats())
+                skipper.window_check_interval = 0.0
+                skipper.status = STATUS_RUN
+            capture = skipper.capture
+            clicks, moves = len(sink.clicks), len(sink.moves)
+            for _ in range(ticks):
+                skipper.tick()
+                clock.advance(skipper.scheduler.min_interval * 4)
+        results[name] = {
+            'size': (skipper.screen.width, skipper.screen.height),
+            'clicks': len(sink.clicks) - clicks,
+            'moves': len(sink.moves) - moves,
+            'moves_inside': all(left <= x < right and top <= y < bottom
+                                for _, (x, y) in sink.moves[moves:]),
+            'rebuilt': skipper.capture is not capture,
+        }
+    results['correct'] = all(
+        r['clicks'] and r['moves'] and r['moves_inside'] and
+        r['size'] == (right - left, bottom - top) and r['rebuilt'] == (name == 'resized')
+        for (name, (left, top, right, bottom)), r in zip(phases, results.values()))
+    return results
+
+
+def measure_overlay_jitter(width: int, height: int, duration: float = 2.0,
+                           status_period: float = 0.25) -> Dict[str, Dict[str, float]]:
+    """
+    Compares tick times with the overlay animating in a thread and in its own process.
+
+    The status changes every status_period seconds, restarting the fade of a
+    BusyOverlay, while the loop ticks on autoplay frames for duration seconds.
+    """
+    screen = ScreenSetup(width, height, layout_file=None)
+    frames, _ = FakeGame(screen).render_script([(FRAME_AUTOPLAY, 1), (FRAME_IDLE, 1)])
+    results = {}
+    for mode in ('thread', 'process'):
+        overlay = BusyOverlay() if mode == 'thread' else OverlayProcess(BusyOverlay)
+        skipper, _ = build_skipper(screen, frames, overlay=overlay, loop=True)
+        skipper.status = STATUS_RUN
+        ticks = []
+        start = next_status = perf_counter()
+        while perf_counter() - start < duration:
+            if perf_counter() >= next_status:
+                skipper.status_overlay.update_status(STATUS_RUN)
+                next_status += status_period
+            tick_start = perf_counter()
+            skipper.tick()
+            ticks.append(perf_counter() - tick_start)
+            sleep(skipper.scheduler.min_interval)
+        overlay.close()
+        p = percentiles(ticks)
+        results[mode] = dict(p, jitter=p['p99'] - p['p50'], ticks=len(ticks))
+    return results
+
+
+# Run in a fresh interpreter: builds a skipper on fake backends and prints its memory use
+COLD_START_SCRIPT = '''
+import json, sys, time
+import numpy as np
+from dialogue_skipper import DialogueSkipper
+from frame_source import GAME_WINDOW_TITLE, ReplayFrameSource
+from input_backend import FakeInputSink
+from screen_setup import ScreenSetup
+from window_tracker import FakeFocusProvider, WindowFocusTracker
+screen = ScreenSetup(1920, 1080, layout_file=None)
+skipper = DialogueSkipper(screen, ReplayFrameSource([np.zeros((1080, 1920, 3), np.uint8)]),
+                          WindowFocusTracker(FakeFocusProvider(GAME_WINDOW_TITLE, hwnd=1)),
+                          FakeInputSink())
+# The Tk overlay is ready once its fonts are loaded and its windows are shown
+overlay = skipper.status_overlay
+while not getattr(overlay, 'overlay_visible', True) and overlay.thread.is_alive():
+    time.sleep(0.01)
+if not getattr(overlay, 'overlay_visible', True):
+    sys.exit('RuntimeError: the overlay window could not be created')
+# Peak resident memory of this process only; ru_maxrss may carry the parent's peak
+try:
+    with open('/proc/self/status') as f:
+        rss = next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+except OSError:
+    import psutil
+    rss = psutil.Process().memory_info().peak_wset / 2 ** 20
+print(json.dumps({'rss_mb': rss, 'tkinter': 'tkinter' in sys.modules}))
+'''
+
+
+def measure_cold_start(rounds: int = 3) -> Dict[str, Dict]:
+    """Times a fresh interpreter building the skipper, headless and with the Tk overlay."""
+    results = {}
+    for mode, headless in (('headless', '1'), ('gui', '0')):
+        env = dict(os.environ, HEADLESS=headless, OVERLAY_PROCESS='0', METRICS='0', STATS='0')
+        timings, report = [], None
+        for _ in range(rounds):
+            start = perf_counter()
+            done = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], env=env,
+                                  cwd=os.path.dirname(os.path.abspath(__file__)),
+                                  capture_output=True, text=True)
+            timings.append(perf_counter() - start)
+            if done.returncode != 0:
+                error = done.stderr.strip().splitlines()
+                report = {'error': error[-1] if error else 'failed'}
+                break
+            report = json.loads(done.stdout.strip().splitlines()[-1])
+        results[mode] = dict(report, ms=percentiles(timings)['p50'])
+    return results
+
+
+def measure_font_lookup(rounds: int = 5) -> Dict[str, float]:
+    """
+    Times the overlay font family lookup from the cache and from a scan of the installed families.
+
+    The real font file is hashed when present, otherwise a 10 MB stand-in.
+    """
+    font_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'assets', 'fonts', 'HYWenHei-85W.ttf')
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        if not os.path.exists(font_path):
+            font_path = os.path.join(directory, 'font.ttf')
+            with open(font_path, 'wb') as f:
+                f.write(np.random.default_rng(0).bytes(10 * 2 ** 20))
+        cache_path = os.path.join(directory, 'font_cache.json')
+        FontFamilyCache(cache_path).store(font_file_hash(font_path), 'HYWenHei 85W')
+        timings = []
+        for _ in range(rounds):
+            start = perf_counter()
+            FontFamilyCache(cache_path).get(font_file_hash(font_path))
+            timings.append(perf_counter() - start)
+        results['cached_ms'] = percentiles(timings)['p50']
+
+    try:
+        import tkinter as tk
+        import tkinter.font as tkFont
+        root = tk.Tk()
+        root.withdraw()
+    except Exception as e:
+        results['scan_error'] = str(e).splitlines()[0]
+        return results
+    timings = []
+    for _ in range(rounds):
+        start = perf_counter()
+        families = list(tkFont.families())
+        timings.append(perf_counter() - start)
+    root.destroy()
+    # Without the cache the families are listed before and after loading the font
+    results['scan_ms'] = percentiles(timings)['p50'] * 2
+    results['families'] = len(families)
+    return results
+
+
+def measure_startup(resolutions: List[str], rounds: int = 200) -> Dict[str, Dict[str, float]]:
+    """Times ScreenSetup creation from the formulas, with a cold and with a warm profile file."""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for resolution in resolutions:
+            width, height = (int(v) for v in resolution.lower().split('x'))
+            path = os.path.join(directory, f'{resolution}.json')
+            formulas, cold, warm = [], [], []
+            for _ in range(rounds):
+                start = perf_counter()
+                ScreenSetup(width, height, layout_file=None)
+                formulas.append(perf_counter() - start)
+
+                if os.path.exists(path):
+                    os.remove(path)
+                start = perf_counter()
+                ScreenSetup(width, height, layout_file=path)
+                cold.append(perf_counter() - start)
+
+                start = perf_counter()
+                ScreenSetup(width, height, layout_file=path)
+                warm.append(perf_counter() - start)
+            results[resolution] = {'formulas': percentiles(formulas)['p50'],
+                                   'cold_cache': percentiles(cold)['p50'],
+                                   'warm_cache': percentiles(warm)['p50']}
+    return results
+
+
+def measure_calibration(resolutions: List[str], rounds: int = 5) -> Dict[str, Dict]:
+    """Times the icon search on an autoplay and an option frame and checks what it found."""
+    results = {}
+    for resolution in resolutions:
+        width, height = (int(v) for v in resolution.lower().split('x'))
+        screen = ScreenSetup(width, height, layout_file=None)
+        game = FakeGame(screen)
+        frames = [game.render(FRAME_AUTOPLAY), game.render(FRAME_OPTION)]
+        timings = []
+        for _ in range(rounds):
+            start = perf_counter()
+            layout = calibrate(frames, screen)
+            timings.append(perf_counter() - start)
+        # The icons of the fake game are centered on the computed coordinates
+        exact = (layout.get('playing_icon_x'), layout.get('playing_icon_y'),
+                 layout.get('dialogue_icon_x')) == \
+                (screen.playing_icon_x, screen.playing_icon_y, screen.dialogue_icon_x)
+        results[resolution] = {'ms': percentiles(timings)['p50'], 'exact': exact}
+    return results
+
+
+def time_option_scan(frame: np.ndarray, rounds: int = 200):
+    """Times the option scan on the capture region of a full-screen frame."""
+    height, width = frame.shape[:2]
+    skipper, _ = build_skipper(ScreenSetup(width, height, layout_file=None), [frame])
+    buffer = skipper.capture.grab()
+    timings = []
+    for _ in range(rounds):
+        start = perf_counter()
+        rows = skipper.options.scan(buffer)
+        timings.append(perf_counter() - start)
+    return percentiles(timings)['p99'], rows
+
+
+def measure_option_scan(resolutions: List[str], frame_paths: List[str]) -> Dict[str, Dict]:
+    """Times the option scan on multi-option frames and on recorded frames."""
+    results = {}
+    for resolution in resolutions:
+        width, height = (int(v) for v in resolution.lower().split('x'))
+        game = FakeGame(ScreenSetup(width, height, layout_file=None))
+        p99, rows = time_option_scan(game.render(FRAME_MULTI_OPTION))
+        results[resolution] = {'p99_ms': p99, 'rows': rows,
+                               'correct': rows == game.option_rows(FRAME_MULTI_OPTION)}
+    for path in frame_paths:
+        p99, rows = time_option_scan(load_frame(path))
+        results[path] = {'p99_ms': p99, 'rows': rows, 'correct': True}
+    return results
+
+
+def print_results(results: List[Dict]):
+    """Prints the scenario results as a table."""
+    print(f"{'resolution':>10} {'scenario':>10} {'ticks/s':>9} {'cpu ms':>8} {'clicks':>6} {'clk/dlg':>7} "
+          f"{'false':>5} {'missed':>6} {'detect p50/p95/p99 ms':>23} {'reaction p50/p95 ms':>20} {'slow':>5}")
+    for r in results:
+        d, re = r['detect_ms'], r['reaction_ms']
+        print(f"{r['resolution']:>10} {r['scenario']:>10} {r['ticks_per_s']:>9.0f} "
+              f"{r['cpu_ms']:>8.1f} {r['clicks']:>6} {r['clicks_per_dialogue']:>7.1f} {r['false_clicks']:>5} {r['missed']:>6} "
+              f"{d['p50']:>7.3f}/{d['p95']:.3f}/{d['p99']:.3f} "
+              f"{re['p50']:>11.2f}/{re['p95']:.2f} {r['transition_ticks']:>5}")
+
+
+def main():
+    """Parses the command line and runs the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--resolution', action='append', metavar='WxH',
+                        help='screen resolution to simulate (repeatable)')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='scenario to play (repeatable, default: all)')
+    parser.add_argument('--json', metavar='PATH', help='also write the results to a JSON file')
+    parser.add_argument('--frames', nargs='+', default=[], metavar='FRAME',
+                        help='recorded PNG or .npy frames to time the option scan on')
+    parser.add_argument('--recording', metavar='PATH',
+                        help='only replay a session recording and compare the detections')
+    parser.add_argument('--startup', action='store_true',
+                        help='only time the startup: screen setup with and without layout '
+                             'profiles, and cold start headless and with the overlay')
+    parser.add_argument('--keys', action='store_true',
+                        help='only measure the F8 resume and F12 exit delays with fake key events')
+    args = parser.parse_args()
+
+    if args.recording:
+        r = replay_recording(args.recording)
+        print(f"Replayed {r['replayed']}/{r['ticks']} ticks, {r['mismatches']} detections differ, "
+              f"detect p50 {r['detect_ms']['p50']:.3f} ms, p99 {r['detect_ms']['p99']:.3f} ms")
+        sys.exit(1 if r['mismatches'] else 0)
+
+    width, height = (int(v) for v in (args.resolution or DEFAULT_RESOLUTIONS)[0].lower().split('x'))
+    if args.keys:
+        keys = measure_resume_latency(width, height)
+        print(f"F8 resume to first click: p50 {keys['resume_ms']['p50']:.2f} ms, "
+              f"p99 {keys['resume_ms']['p99']:.2f} ms")
+        print(f"F12 exit to loop end: p50 {keys['exit_ms']['p50']:.2f} ms, "
+              f"p99 {keys['exit_ms']['p99']:.2f} ms")
+        sys.exit(0 if keys['within_budget'] else 1)
+
+    if args.startup:
+        print(f"{'resolution':>10} {'formulas ms':>12} {'cold cache ms':>14} {'warm cache ms':>14}")
+        for resolution, r in measure_startup(args.resolution or DEFAULT_RESOLUTIONS).items():
+            print(f"{resolution:>10} {r['formulas']:>12.3f} {r['cold_cache']:>14.3f} "
+                  f"{r['warm_cache']:>14.3f}")
+        fonts = measure_font_lookup()
+        print(f"\nOverlay font family from the cache: {fonts['cached_ms']:.1f} ms")
+        if 'scan_ms' in fonts:
+            print(f"Overlay font family from a scan of {fonts['families']} families: "
+                  f"{fonts['scan_ms']:.1f} ms, plus a 500 ms wait for the font to register")
+        else:
+            print(f"Overlay font family from a scan: unavailable ({fonts['scan_error']})")
+        print()
+        for mode, r in measure_cold_start().items():
+            if 'error' in r:
+                print(f"Cold start {mode}: unavailable ({r['error']})")
+            else:
+                print(f"Cold start {mode}: {r['ms']:.0f} ms, {r['rss_mb']:.1f} MB resident, "
+                      f"tkinter {'loaded' if r['tkinter'] else 'not loaded'}")
+        return
+
+    results = []
+    for resolution in args.resolution or DEFAULT_RESOLUTIONS:
+        scenario_width, scenario_height = (int(v) for v in resolution.lower().split('x'))
+        for name in args.scenario or sorted(SCENARIOS):
+            results.append(run_scenario(scenario_width, scenario_height, name))
+    print_results(results)
+
+    calibration = measure_calibration(args.resolution or DEFAULT_RESOLUTIONS)
+    print()
+    for resolution, r in calibration.items():
+        print(f"Calibration {resolution}: {r['ms']:.1f} ms, "
+              f"{'icons found' if r['exact'] else 'ICONS MISPLACED'}")
+
+    option_scan = measure_option_scan(args.resolution or DEFAULT_RESOLUTIONS, args.frames)
+    print()
+    for name, r in option_scan.items():
+        print(f"Option scan {name}: p99 {r['p99_ms']:.3f} ms, {len(r['rows'])} options"
+              f"{'' if r['correct'] else ' (WRONG)'}")
+
+    overlay = measure_overlay_jitter(width, height)
+    print(f"\nOverlay jitter on {os.cpu_count()} CPU(s):")
+    for mode, r in overlay.items():
+        print(f"Tick time with the overlay in a {mode}: p50 {r['p50']:.3f} ms, "
+              f"p99 {r['p99']:.3f} ms, jitter {r['jitter']:.3f} ms")
+
+    control = measure_resume_latency(width, height)
+    print(f"\nF8 resume to first click: p50 {control['resume_ms']['p50']:.2f} ms, "
+          f"p99 {control['resume_ms']['p99']:.2f} ms")
+    print(f"F12 exit to loop end: p50 {control['exit_ms']['p50']:.2f} ms, "
+          f"p99 {control['exit_ms']['p99']:.2f} ms")
+    control.update(measure_control_api(width, height))
+    print(f"Control API state query: p50 {control['state_ms']['p50']:.2f} ms, "
+          f"start to first click: p50 {control['start_to_click_ms']['p50']:.2f} ms")
+
+    pipelined = measure_pipeline(width, height)
+    stages = pipelined['pipeline']
+    print(f"\nPipeline stages: capture {stages['capture']['mean_ms']:.2f} ms, "
+          f"detect {stages['detect']['mean_ms']:.2f} ms, "
+          f"click {stages['actuate']['mean_ms']:.2f} ms, "
+          f"reaction {stages['reaction']['mean_ms']:.2f} ms mean / "
+          f"{stages['reaction']['max_ms']:.2f} ms max, "
+          f"{stages['dropped']['frames']} stale frames and {stages['dropped']['clicks']} clicks dropped")
+    print(f"Dialogues clicked: tick loop {pipelined['tick']['answered']} "
+          f"({pipelined['tick']['clicks']} clicks), pipeline {stages['answered']} "
+          f"({stages['clicks']} clicks) of {stages['dialogues']}; false clicks "
+          f"{pipelined['tick']['false_clicks']} and {stages['false_clicks']}"
+          f"{'' if pipelined['correct'] else ' (WRONG)'}")
+
+    multi = measure_supervisor(width, height)
+    print(f"\nTwo windows in worker processes, the first in the foreground: "
+          f"{', '.join(str(w['clicks']) for w in multi['windows'])} clicks, "
+          f"{sum(w['ticks'] for w in multi['windows'])} ticks from {multi['grabs']} shared grabs"
+          f"{'' if multi['correct'] else ' (WRONG)'}")
+
+    follow = measure_window_follow(width, height)
+    print('\nGame window followed: ' + ', '.join(
+        f"{name} {r['size'][0]}x{r['size'][1]} {r['clicks']} clicks"
+        f"{', rebuilt' if r['rebuilt'] else ''}" for name, r in follow.items() if name != 'correct')
+        + ('' if follow['correct'] else ' (WRONG)'))
+
+    stats = measure_session_stats(width, height)
+    print(f"\nTick time with session statistics off: p50 {stats['off']['p50']:.3f} ms, "
+          f"p99 {stats['off']['p99']:.3f} ms")
+    print(f"Tick time with session statistics on: p50 {stats['on']['p50']:.3f} ms, "
+          f"p99 {stats['on']['p99']:.3f} ms, totals {'stored' if stats['stored'] else 'WRONG'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'scenarios': results, 'calibration': calibration,
+                       'option_scan': option_scan, 'overlay': overlay,
+                       'control': control, 'session_stats': stats,
+                       'supervisor': multi, 'window_follow': follow,
+                       'pipeline': pipelined}, f, indent=2)
+
+    # A false click, a missed dialogue, a misplaced icon, a slow scan or a slow shortcut
+    # is a regression
+    if any(r['false_clicks'] or r['missed'] for r in results) or \
+       not all(r['exact'] for r in calibration.values()) or not stats['stored'] or \
+       not control['within_budget'] or not pipelined['correct'] or \
+       not multi['correct'] or not follow['correct'] or \
+       not all(r['correct'] and r['p99_ms'] < OPTION_SCAN_BUDGET_MS for r in option_scan.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Crabe Dialogue Skipper calibration
+Finds the autoplay and dialogue option icons on captured frames and saves their coordinates.
+"""
+
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from constants import (COLOR_AUTOPLAY_ICON, COLOR_WHITE, LAYOUT_FILE,
+                     CALIBRATION_TOLERANCE, ICON_MIN_FILL)
+from frame_source import GAME_WINDOW_TITLE, load_frame
+from layout_profile import LayoutProfileCache
+from option_detector import icon_height_limits
+
+Region = Tuple[int, int, int, int]
+
+def _matches(pixels: np.ndarray, color, tolerance: int) -> np.ndarray:
+    """Returns the mask of the pixels within tolerance of a color on every channel."""
+    return (np.abs(pixels.astype(np.int16) - np.array(color, dtype=np.int16))
+            .max(axis=-1) <= tolerance)
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """Returns the (start, end) index pairs of the True runs of a 1-D mask, end excluded."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+
+def search_step(height: int) -> int:
+    """Returns the coarse search stride, kept below half the smallest icon size."""
+    return max(1, height // 540)
+
+
+def autoplay_region(width: int, height: int) -> Region:
+    """Returns the top-left area where the autoplay icon is searched."""
+    return 0, 0, min(width, max(width // 5, 400)), height // 10
+
+
+def option_region(width: int, height: int) -> Region:
+    """Returns the right-center area where the dialogue option icons are searched."""
+    return width // 2, height * 55 // 100, width * 85 // 100, height * 85 // 100
+
+
+def find_autoplay_icon(frame: np.ndarray, tolerance: int = CALIBRATION_TOLERANCE
+                       ) -> Optional[Tuple[int, int]]:
+    """
+    Locates the autoplay icon with a strided search refined at full resolution.
+
+    Returns:
+        The frame coordinates of the icon pixel closest to the icon center that
+        best matches COLOR_AUTOPLAY_ICON, or None if the icon is not visible
+    """
+    height, width = frame.shape[:2]
+    left, top, right, bottom = autoplay_region(width, height)
+    step = search_step(height)
+
+    # Coarse pass on a strided view, no copy of the frame
+    coarse = _matches(frame[top:bottom:step, left:right:step], COLOR_AUTOPLAY_ICON, tolerance)
+    ys, xs = np.nonzero(coarse)
+    if not len(ys):
+        return None
+
+    # Fine pass around the coarse hits
+    x0 = max(left, left + int(xs.min()) * step - step)
+    y0 = max(top, top + int(ys.min()) * step - step)
+    x1 = min(right, left + int(xs.max()) * step + step + 1)
+    y1 = min(bottom, top + int(ys.max()) * step + step + 1)
+    window = frame[y0:y1, x0:x1].astype(np.int16)
+    diff = np.abs(window - np.array(COLOR_AUTOPLAY_ICON, dtype=np.int16)).max(axis=-1)
+    ys, xs = np.nonzero(diff <= tolerance)
+    center_y, center_x = ys.mean(), xs.mean()
+
+    best = diff[ys, xs] == diff[ys, xs].min()
+    ys, xs = ys[best], xs[best]
+    nearest = np.argmin((ys - center_y) ** 2 + (xs - center_x) ** 2)
+    return x0 + int(xs[nearest]), y0 + int(ys[nearest])
+
+
+def find_option_icon(frame: np.ndarray, tolerance: int = CALIBRATION_TOLERANCE
+                     ) -> Optional[Tuple[int, int, int]]:
+    """
+    Locates the icon of the bottom dialogue option.
+
+    The icons form the leftmost white column of the option area; the text of the
+    options lies to their right. The leftmost white shape must have the size
+    OptionDetector scans for and the shape of an icon, so a subtitle or other
+    white text is not taken for an option.
+
+    Returns:
+        (x, top y, bottom y) of the bottom icon in frame coordinates, or None when
+        no icon-sized shape leads the option area
+    """
+    height, width = frame.shape[:2]
+    left, top, right, bottom = option_region(width, height)
+    step = search_step(height)
+    min_height, max_height = icon_height_limits(height)
+
+    coarse = _matches(frame[top:bottom:step, left:right:step], COLOR_WHITE, tolerance)
+    columns = np.flatnonzero(coarse.any(axis=0))
+    if not len(columns):
+        return None
+
+    # Fine pass on the columns around the leftmost coarse hit
+    x0 = max(left, left + int(columns[0]) * step - step)
+    x1 = min(right, x0 + 3 * step + 2 * max_height)
+    window = _matches(frame[top:bottom, x0:x1], COLOR_WHITE, tolerance)
+    icon_columns = _runs(window.any(axis=0))
+    if not icon_columns:
+        return None
+    start, end = icon_columns[0]
+    x = x0 + (start + end - 1) // 2
+
+    icon_rows = [(row_start, row_end) for row_start, row_end in _runs(window[:, x - x0])
+                 if min_height <= row_end - row_start <= max_height]
+    if not icon_rows:
+        return None
+    row_start, row_end = icon_rows[-1]
+
+    # An icon is wider than a text stroke but no wider than the tallest icon, and is
+    # set apart from the option text, while glyphs follow each other a few pixels apart
+    runs = _runs(window[row_start:row_end].any(axis=0))
+    icon_width = runs[0][1] - runs[0][0]
+    gap = max(min_height, icon_width // 2)
+    if not min_height <= icon_width <= max_height or runs[0][1] + gap > window.shape[1]:
+        return None
+    if len(runs) > 1 and runs[1][0] - runs[0][1] < gap:
+        return None
+    # Glyphs are thin strokes, an icon fills most of its bounding box
+    if window[row_start:row_end, runs[0][0]:runs[0][1]].mean() < ICON_MIN_FILL:
+        return None
+    return x, top + row_start, top + row_end - 1
+
+
+def calibrate(frames: List[np.ndarray], screen_setup,
+              tolerance: int = CALIBRATION_TOLERANCE) -> Dict[str, int]:
+    """
+    Computes probe coordinates from one or more frames.
+
+    Each coordinate is the median of the frames where its icon was found, so a
+    frame showing only the autoplay icon and another showing only an option can
+    be combined.
+
+    Returns:
+        The calibrated ScreenSetup coordinates; icons never found are left out
+    """
+    autoplay, options = [], []
+    for frame in frames:
+        found = find_autoplay_icon(frame, tolerance)
+        if found:
+            autoplay.append(found)
+        found = find_option_icon(frame, tolerance)
+        if found:
+            options.append(found)
+
+    layout = {}
+    if autoplay:
+        x, y = np.median(np.array(autoplay), axis=0).astype(int).tolist()
+        layout.update(playing_icon_x=x, playing_icon_y=y)
+    if options:
+        x, icon_top, icon_bottom = np.median(np.array(options), axis=0).astype(int).tolist()
+        # Probe inside the icon, a quarter of its height from each edge
+        margin = (icon_bottom - icon_top) // 4
+        higher_y, lower_y = icon_top + margin, icon_bottom - margin
+        shift = x - screen_setup.dialogue_icon_x
+        layout.update(
+            dialogue_icon_x=x,
+            dialogue_icon_higher_y=higher_y,
+            dialogue_icon_lower_y=lower_y,
+            bottom_dialogue_min_x=screen_setup.bottom_dialogue_min_x + shift,
+            bottom_dialogue_max_x=screen_setup.bottom_dialogue_max_x + shift,
+            bottom_dialogue_min_y=higher_y,
+            bottom_dialogue_max_y=lower_y,
+        )
+    return layout
+
+
+def main():
+    """Calibrates from screenshots, or from the game window, and saves the result."""
+    from screen_setup import ScreenSetup
+    from window_tracker import enable_dpi_awareness
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('frames', nargs='*', metavar='FRAME',
+                        help='PNG or .npy screenshots of the game window client area '
+                             '(default: capture the game window)')
+    parser.add_argument('--layout-file', default=LAYOUT_FILE,
+                        help=f'layout profile file to update (default: {LAYOUT_FILE})')
+    parser.add_argument('--dry-run', action='store_true', help='print the coordinates only')
+    args = parser.parse_args()
+
+    if args.frames:
+        frames = [load_frame(path) for path in args.frames]
+    else:
+        from frame_source import LiveFrameSource
+        from window_tracker import Win32FocusProvider
+        # Same physical pixels and window-relative coordinates as the skipper
+        enable_dpi_awareness()
+        provider = Win32FocusProvider()
+        rect = provider.window_rect(provider.find_window(GAME_WINDOW_TITLE))
+        if rect is None:
+            print(f'No {GAME_WINDOW_TITLE} window found. Show the game, not minimized, '
+                  'or pass screenshots of it.')
+            return
+        frames = [LiveFrameSource().grab(rect)]
+
+    height, width = frames[0].shape[:2]
+    screen = ScreenSetup(width, height, layout_file=None)
+    layout = calibrate(frames, screen)
+    if not layout:
+        print('No icon found. Capture a frame showing a dialogue with the autoplay button '
+              'or dialogue options visible.')
+        return
+    for field, value in sorted(layout.items()):
+        print(f'{field}: {value}')
+
+    if not args.dry_run:
+        profiles = LayoutProfileCache(args.layout_file, ScreenSetup.layout_formula_hash())
+        profiles.set_override(width, height, layout)
+        print(f'Saved as overrides for {width}x{height} in {args.layout_file}')
+
+
+if __name__ == "__main__":
+    main()
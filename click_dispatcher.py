@@ -0,0 +1,96 @@
+"""Module limiting the clicks and cursor moves sent to the game."""
+
+from time import perf_counter
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from constants import CLICK_MAX_RATE, CLICK_REPEAT_INTERVAL
+from pipeline import StageStats
+
+class ClickDispatcher:
+    """Rate-limited actuator coalescing clicks on an unchanged dialogue state."""
+
+    def __init__(self, sink, max_rate: float = CLICK_MAX_RATE,
+                 repeat_interval: float = CLICK_REPEAT_INTERVAL,
+                 clock: Callable[[], float] = perf_counter):
+        """
+        Initializes the dispatcher.
+
+        Args:
+            sink: InputSink performing the clicks and cursor moves
+            max_rate: Highest number of clicks per second
+            repeat_interval: Delay in seconds before the same dialogue state is clicked again
+            clock: Time source in seconds, replaced by a simulated clock in benchmarks
+        """
+        if max_rate <= 0:
+            raise ValueError("The click rate must be positive")
+        self.sink = sink
+        self.min_gap = 1.0 / max_rate
+        self.repeat_interval = max(repeat_interval, self.min_gap)
+        self.clock = clock
+        self.last_key: Optional[Hashable] = None
+        self.last_click = float('-inf')
+        self.position: Optional[Tuple[int, int]] = None
+
+        # Counters for tuning and benchmarks
+        self.dispatched = 0
+        self.coalesced = 0
+        self.throttled = 0
+        self.moves = 0
+        self.latency = StageStats()
+
+    def ready(self, key: Hashable) -> bool:
+        """Checks if a click on a dialogue state would be sent now."""
+        gap = self.repeat_interval if key == self.last_key else self.min_gap
+        return self.clock() - self.last_click >= gap
+
+    def dispatch(self, key: Hashable, position: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        Clicks on a dialogue state unless it is redundant or over the rate limit.
+
+        Args:
+            key: Identifies the dialogue state; clicks on the same state are coalesced
+            position: Cursor position to click at, None to stay in place
+
+        Returns:
+            bool: True if the click was sent
+        """
+        if not self.ready(key):
+            if key == self.last_key:
+                self.coalesced += 1
+            else:
+                self.throttled += 1
+            return False
+
+        start = perf_counter()
+        # The cursor only moves when the target changes
+        if position is not None and position != self.position:
+            self.sink.move(position)
+            self.position = position
+            self.moves += 1
+        self.sink.click()
+        self.latency.record(perf_counter() - start)
+        self.last_key = key
+        self.last_click = self.clock()
+        self.dispatched += 1
+        return True
+
+    def reset(self):
+        """Forgets the last click, so the next dialogue is clicked at once."""
+        self.last_key = None
+        self.last_click = float('-inf')
+
+    def report(self) -> Dict[str, float]:
+        """Returns the click counters and the dispatch latency."""
+        return {
+            'dispatched': self.dispatched,
+            'coalesced': self.coalesced,
+            'throttled': self.throttled,
+            'moves': self.moves,
+            'latency': self.latency.as_dict(),
+        }
+
+    def summary(self) -> str:
+        """Formats the report as a single line for the console."""
+        return (f"Clicks: {self.dispatched} sent, {self.coalesced} coalesced, "
+                f"{self.throttled} over the rate limit, {self.moves} cursor moves, "
+                f"dispatch {self.latency.mean * 1000:.2f} ms mean")
@@ -4,11 +4,130 @@
 COLOR_WHITE = (255, 255, 255)
 COLOR_AUTOPLAY_ICON = (236, 229, 216)
 
+# Detection probe roles
+PROBE_AUTOPLAY = 'autoplay'
+PROBE_OPTION = 'option'
+
+# Per-channel color tolerance and patch half-size of the default probes
+PROBE_TOLERANCE = 0
+PROBE_PATCH_RADIUS = 0
+
+# Sample grid spacing (pixels) and result lifetime (seconds) of the change gate
+GATE_SAMPLE_STRIDE = 32
+GATE_MAX_AGE = 0.5
+
+# Pipeline mode: frames kept for the detector, pending clicks, wait timeout (seconds)
+PIPELINE_RING_SIZE = 4
+PIPELINE_ACTION_QUEUE_SIZE = 2
+PIPELINE_FRAME_TIMEOUT = 0.1
+
+# Shared screen capture of the window workers: age (seconds) under which a frame is
+# reused instead of grabbed again (one 60 Hz refresh), and how long (seconds) a worker
+# waits for a new frame before reusing the last one
+SHARED_CAPTURE_MAX_AGE = 1 / 60
+SHARED_CAPTURE_TIMEOUT = 1.0
+
+# Session recording ring file and its size limit (megabytes)
+RECORD_FILE = 'session.rec'
+RECORD_MAX_MB = 64
+RECORD_FILE_VERSION = 1
+
+# Session statistics database, the delay (seconds) between two writes,
+# and how long (seconds) the program waits for the last write when closing
+STATS_FILE = 'stats.db'
+STATS_FLUSH_INTERVAL = 30.0
+STATS_CLOSE_TIMEOUT = 2.0
+
+# Metrics snapshot file and its refresh period (seconds)
+METRICS_FILE = 'metrics.json'
+METRICS_INTERVAL = 5.0
+
+# Profiling: collapsed stack file, sampling period (seconds), ticks replayed
+# on saved frames, and number of functions summarized
+PROFILE_FILE = 'profile.folded'
+PROFILE_INTERVAL = 0.001
+PROFILE_TICKS = 1000
+PROFILE_TOP = 15
+
+# Cached per-resolution coordinates; bump the version when the file format changes
+LAYOUT_FILE = 'layouts.json'
+LAYOUT_FILE_VERSION = 1
+
+# Overlay font family resolved on a previous start, keyed by the font file hash
+FONT_CACHE_FILE = 'font_cache.json'
+
+# Per-channel color tolerance of the icon search during calibration
+CALIBRATION_TOLERANCE = 8
+
+# Minimum share of white pixels in the bounding box of a calibrated dialogue option icon
+ICON_MIN_FILL = 0.6
+
+# Which dialogue option to click: bottom, top, or the index of an option from the top
+OPTION_POLICY_BOTTOM = 'bottom'
+OPTION_POLICY_TOP = 'top'
+
+# Screen states told apart by the transition classifier
+SCREEN_GAMEPLAY = 'gameplay'
+SCREEN_LOADING = 'loading'
+SCREEN_BLACK_FADE = 'black_fade'
+
+# Luminance sample spacing (pixels) and thresholds (0-255) of the transition classifier
+TRANSITION_STRIDE = 16
+LOADING_MIN_LUMA = 235
+LOADING_MAX_SPREAD = 12
+FADE_MAX_LUMA = 20
+FADE_MAX_SPREAD = 8
+
+# Game states of the detection state machine
+GAME_PAUSED = 'paused'
+GAME_UNFOCUSED = 'unfocused'
+GAME_LOADING = 'loading'
+GAME_FREE_ROAM = 'free_roam'
+GAME_AUTOPLAY = 'autoplay'
+GAME_OPTION = 'option'
+# Never reorder: the position is the state code stored in session recordings
+GAME_STATES = (GAME_PAUSED, GAME_UNFOCUSED, GAME_LOADING, GAME_FREE_ROAM, GAME_AUTOPLAY,
+               GAME_OPTION)
+
 # Program states
 STATUS_RUN = 'run'
 STATUS_PAUSE = 'pause'
 STATUS_EXIT = 'exit'
 
+# Status sinks of the headless mode, and the files they write to
+STATUS_SINK_CONSOLE = 'console'
+STATUS_SINK_LOG = 'log'
+STATUS_SINK_FILE = 'file'
+STATUS_LOG_FILE = 'status.log'
+STATUS_FILE = 'status.txt'
+
+# Polling intervals (seconds) of the detection loop
+POLL_MIN_INTERVAL = 0.01
+POLL_MAX_INTERVAL = 0.25
+POLL_BACKOFF_FACTOR = 1.5
+POLL_TRANSITION_INTERVAL = 0.5
+
+# Click dispatch limits: clicks per second overall, and delay (seconds)
+# before the same dialogue state is clicked again
+CLICK_MAX_RATE = 12.0
+CLICK_REPEAT_INTERVAL = 0.15
+
+# Refresh delays (seconds) of the cached game window focus
+FOCUS_POLL_TTL = 0.1
+FOCUS_EVENT_TTL = 2.0
+
+# Delay (seconds) between two checks of the game window position and size
+WINDOW_CHECK_INTERVAL = 0.5
+
+# Local control server: loopback address, port (0 picks a free one) and commands
+CONTROL_HOST = '127.0.0.1'
+CONTROL_PORT = 8765
+CONTROL_START = 'start'
+CONTROL_PAUSE = 'pause'
+CONTROL_EXIT = 'exit'
+CONTROL_STATE = 'state'
+CONTROL_STATS = 'stats'
+
 # Control keys
 KEY_START = 'Key.f8'
 KEY_PAUSE = 'Key.f9'
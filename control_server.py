@@ -0,0 +1,145 @@
+"""Module exposing a local control and statistics API for scripts and tools."""
+
+import asyncio
+import json
+import socket
+from threading import Event, Thread
+from typing import Dict, Optional, Tuple, Union
+
+from constants import (CONTROL_HOST, CONTROL_PORT, CONTROL_START, CONTROL_PAUSE,
+                     CONTROL_EXIT, CONTROL_STATE, CONTROL_STATS)
+
+# Seconds a client waits for a reply
+CLIENT_TIMEOUT = 2.0
+
+class ControlServer:
+    """
+    Line-based JSON server driving a DialogueSkipper.
+
+    Each request is one command per line (start, pause, exit, state or stats)
+    and each reply is one JSON object per line with an "ok" field.
+    """
+
+    def __init__(self, skipper, host: str = CONTROL_HOST, port: int = CONTROL_PORT,
+                 socket_path: Optional[str] = None):
+        """
+        Initializes the server without starting it.
+
+        Args:
+            skipper: DialogueSkipper to control
+            host: Loopback address to listen on
+            port: TCP port, 0 to pick a free one
+            socket_path: Unix socket to listen on instead of TCP, where supported
+        """
+        self.skipper = skipper
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.address: Union[Tuple[str, int], str, None] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.server = None
+        self.ready = Event()
+        self.error: Optional[Exception] = None
+        self.thread = Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Starts listening on a background thread and waits until the socket is bound."""
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        """Runs the event loop of the server."""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._listen())
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.ready.set()
+        self.loop.run_forever()
+        # Drop the clients still connected before closing the loop
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.close()
+
+    async def _listen(self):
+        """Binds the socket."""
+        if self.socket_path:
+            self.server = await asyncio.start_unix_server(self._serve, path=self.socket_path)
+            self.address = self.socket_path
+        else:
+            self.server = await asyncio.start_server(self._serve, self.host, self.port)
+            self.address = self.server.sockets[0].getsockname()[:2]
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answers the commands of one client until it disconnects."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode('utf-8', 'replace').strip().lower()
+                writer.write((json.dumps(self.execute(command)) + '\n').encode('utf-8'))
+                await writer.drain()
+                if command == CONTROL_EXIT:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            # Client gone, or server stopping
+            pass
+        finally:
+            writer.close()
+
+    def execute(self, command: str) -> Dict:
+        """
+        Applies one command.
+
+        Returns:
+            Dict: The reply, with "ok" False and an "error" for unknown commands
+        """
+        skipper = self.skipper
+        if command == CONTROL_START:
+            skipper.start()
+        elif command == CONTROL_PAUSE:
+            skipper.pause()
+        elif command == CONTROL_EXIT:
+            # The loop thread does the closing, the reply still goes out
+            self.loop.call_soon(skipper.shutdown)
+        elif command == CONTROL_STATS:
+            return {'ok': True, 'stats': skipper.stats()}
+        elif command != CONTROL_STATE:
+            return {'ok': False, 'error': f"Unknown command: {command}"}
+        return {'ok': True, 'state': skipper.state()}
+
+    def stop(self):
+        """Closes the socket and stops the event loop."""
+        if self.loop is None or self.loop.is_closed():
+            return
+        def close():
+            if self.server is not None:
+                self.server.close()
+            self.loop.stop()
+        self.loop.call_soon_threadsafe(close)
+        self.thread.join(CLIENT_TIMEOUT)
+
+
+def send_command(address: Union[Tuple[str, int], str], command: str) -> Dict:
+    """
+    Sends one command to a control server and returns its reply.
+
+    Args:
+        address: (host, port) of a TCP server or the path of a Unix socket
+        command: start, pause, exit, state or stats
+    """
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    with socket.socket(family, socket.SOCK_STREAM) as connection:
+        connection.settimeout(CLIENT_TIMEOUT)
+        connection.connect(address)
+        connection.sendall(command.encode('utf-8') + b'\n')
+        reply = connection.makefile('r', encoding='utf-8').readline()
+    return json.loads(reply)
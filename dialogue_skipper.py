@@ -1,94 +1,414 @@
 """Module managing the automatic skipping of dialogues in Genshin Impact."""
 
+import os
 import sys
 from random import randint, uniform
-from typing import Tuple, Union
-from time import perf_counter, sleep
+from threading import Condition
+from typing import TYPE_CHECKING, Dict, Tuple, Union
+from time import perf_counter
 
-from pyautogui import click, getActiveWindowTitle, pixel
-from pynput.mouse import Controller # type: ignore
-from pynput.keyboard import Key, KeyCode # type: ignore
-import win32gui # type: ignore
-import win32con # type: ignore
+import numpy as np
 
-from constants import (COLOR_AUTOPLAY_ICON, COLOR_WHITE, 
+if TYPE_CHECKING:
+    from pynput.keyboard import Key, KeyCode # type: ignore
+
+from click_dispatcher import ClickDispatcher
+from constants import (PROBE_AUTOPLAY, PROBE_OPTION, SCREEN_GAMEPLAY,
+                     GAME_PAUSED, GAME_UNFOCUSED, GAME_LOADING, GAME_FREE_ROAM,
                      STATUS_RUN, STATUS_PAUSE, STATUS_EXIT,
+                     POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_TRANSITION_INTERVAL,
+                     METRICS_FILE, METRICS_INTERVAL, OPTION_POLICY_BOTTOM,
+                     CLICK_MAX_RATE, CLICK_REPEAT_INTERVAL, STATUS_SINK_CONSOLE,
+                     RECORD_FILE, RECORD_MAX_MB, STATS_FILE, STATS_FLUSH_INTERVAL,
+                     WINDOW_CHECK_INTERVAL,
                      KEY_START, KEY_PAUSE, KEY_EXIT, KEY_HELP)
-from status_overlay import StatusOverlay
+from frame_source import LiveFrameSource
+from game_state import GameStateMachine, build_state_plans, next_state
+from input_backend import LiveInputSink
+from instrumentation import Instrumentation, NullInstrumentation
+from option_detector import OptionDetector, choose_option, parse_policy
+from pipeline import DetectionPipeline
+from poll_scheduler import AdaptivePollScheduler
+from probe_engine import ProbeEngine, default_probe_specs, probe_bounds
+from screen_capture import FrameChangeGate, ProbeCapture, union_bounds
+from session_stats import NullSessionStats, SessionStats
+from transition_classifier import TransitionClassifier
+from window_tracker import FrameSourceFocusProvider, Win32FocusProvider, WindowFocusTracker
 
 class DialogueSkipper:
     """Main class managing dialogue skipping in Genshin Impact."""
     
-    def __init__(self, screen_setup):
-        """Initializes the dialogue skipper with the specified screen configuration."""
+    def __init__(self, screen_setup, frame_source=None, focus_tracker=None, input_sink=None,
+                 status_overlay=None, metrics=None, click_dispatcher=None, session_stats=None):
+        """
+        Initializes the dialogue skipper with the specified screen configuration.
+        
+        The live desktop backends are used for every backend that is not given,
+        except the focus of a replayed frame source, read from its window titles.
+        """
         self.screen = screen_setup
+        self.frame_source = frame_source if frame_source is not None else LiveFrameSource()
+        self.input = input_sink if input_sink is not None else LiveInputSink()
+        if focus_tracker is None:
+            if isinstance(self.frame_source, LiveFrameSource):
+                focus_tracker = WindowFocusTracker(Win32FocusProvider())
+            else:
+                # Title changes are tied to frames, so they are read on every tick
+                focus_tracker = WindowFocusTracker(FrameSourceFocusProvider(self.frame_source),
+                                                   ttl=0.0)
+        self.focus = focus_tracker
+        if click_dispatcher is None:
+            click_dispatcher = ClickDispatcher(
+                self.input,
+                float(os.getenv('CLICK_MAX_RATE', CLICK_MAX_RATE)),
+                float(os.getenv('CLICK_REPEAT_INTERVAL', CLICK_REPEAT_INTERVAL)))
+        self.dispatcher = click_dispatcher
+        self.option_policy = parse_policy(os.getenv('OPTION_POLICY', OPTION_POLICY_BOTTOM))
+        self.option_rows = []
+        self.last_target = None
+        self.probe_results = {}
+        self.transitions = TransitionClassifier()
+        self.screen_state = SCREEN_GAMEPLAY
+        self.refreshed = False
         self.status = STATUS_PAUSE
-        self.mouse = Controller()
+        self.status_changed = Condition()
         self.last_reposition = 0.0
         self.time_between_repositions = self.random_interval() * 40
+        self.scheduler = AdaptivePollScheduler(
+            float(os.getenv('POLL_MIN_INTERVAL', POLL_MIN_INTERVAL)),
+            float(os.getenv('POLL_MAX_INTERVAL', POLL_MAX_INTERVAL)),
+            transition_interval=float(os.getenv('POLL_TRANSITION_INTERVAL', POLL_TRANSITION_INTERVAL)))
+        self.pipelined = os.getenv('PIPELINE', '0') == '1'
+        self.game_state = GameStateMachine()
+        self.state_plans = build_state_plans(self.scheduler)
+        self.recorder = None
+        
+        # Coordinates are relative to the game window, rebuilt when its size changes
+        self.window_check_interval = float(os.getenv('WINDOW_CHECK_INTERVAL',
+                                                     WINDOW_CHECK_INTERVAL))
+        self.last_window_check = float('-inf')
+        self._build_geometry()
+        self.follow_window()
         
         # Create the status overlay
-        self.status_overlay = StatusOverlay()
+        if status_overlay is None:
+            if os.getenv('HEADLESS', '0') == '1':
+                # No window, font or Tk import at all
+                from status_sink import create_status_sink
+                status_overlay = create_status_sink(os.getenv('STATUS_SINK', STATUS_SINK_CONSOLE))
+            elif os.getenv('OVERLAY_PROCESS', '0') == '1':
+                # Fades and the help window cannot stall the detection loop
+                from overlay_process import OverlayProcess
+                status_overlay = OverlayProcess()
+            else:
+                from status_overlay import StatusOverlay
+                status_overlay = StatusOverlay()
+        self.status_overlay = status_overlay
+        
+        # Phase timings, only collected when enabled
+        if metrics is None:
+            if os.getenv('METRICS', '0') == '1':
+                metrics = Instrumentation(os.getenv('METRICS_FILE', METRICS_FILE),
+                                          float(os.getenv('METRICS_INTERVAL', METRICS_INTERVAL)))
+            else:
+                metrics = NullInstrumentation()
+        self.metrics = metrics
+        if os.getenv('METRICS_OVERLAY', '0') == '1':
+            self.metrics.subscribe(lambda m: self.status_overlay.show_metrics(m.overlay_line()))
+        
+        # Totals kept across sessions, written in batches off the detection loop
+        if session_stats is None:
+            if os.getenv('STATS', '1') == '1':
+                session_stats = SessionStats(
+                    os.getenv('STATS_FILE', STATS_FILE),
+                    float(os.getenv('STATS_FLUSH_INTERVAL', STATS_FLUSH_INTERVAL)),
+                    lambda: self.game_state.report()['dwell_s'],
+                    f'{self.screen.width}x{self.screen.height}')
+            else:
+                session_stats = NullSessionStats()
+        self.session_stats = session_stats
+        
+        # Replayable log of what detection saw and decided
+        if os.getenv('RECORD', '0') == '1':
+            from session_recorder import SessionRecorder
+            # Only the pixels the detectors read are stored
+            self.recorder = SessionRecorder(
+                os.getenv('RECORD_FILE', RECORD_FILE), self.capture.bbox,
+                (self.screen.width, self.screen.height), self.probes.rows, self.probes.cols,
+                self.options.scanned_region, self.transitions.stride,
+                float(os.getenv('RECORD_MAX_MB', RECORD_MAX_MB)))
+    
+    def _build_geometry(self):
+        """Places the capture region, the probes and the option scan for the current game size."""
+        specs = default_probe_specs(self.screen)
+        self.options = OptionDetector(self.screen)
+        self.capture = ProbeCapture(self.frame_source,
+                                    union_bounds(probe_bounds(specs), self.options.bounds),
+                                    self.screen.origin)
+        self.probes = ProbeEngine(specs, self.capture.origin)
+        self.options.set_origin(*self.capture.origin)
+        option_rows, option_cols = self.options.sample_points()
+        self.change_gate = FrameChangeGate(
+            self.capture.shape,
+            np.concatenate([self.probes.rows, option_rows]),
+            np.concatenate([self.probes.cols, option_cols]))
+        
+        # Each game state only evaluates the probes able to leave it
+        self.probe_sets = {}
+        for plan in self.state_plans.values():
+            if plan.roles and plan.roles not in self.probe_sets:
+                self.probe_sets[plan.roles] = ProbeEngine(
+                    [p for p in specs if p.role in plan.roles], self.capture.origin)
+    
+    def follow_window(self) -> bool:
+        """
+        Follows the moves and resizes of the game window, checked every window_check_interval.
+        
+        A move only shifts the capture; a resize recomputes every coordinate.
+        
+        Returns:
+            bool: True if the window moved or was resized
+        """
+        now = perf_counter()
+        if now - self.last_window_check < self.window_check_interval:
+            return False
+        self.last_window_check = now
+        rect = self.focus.window_rect()
+        if rect is None:
+            # No window to follow: the game keeps the last known place
+            return False
+        origin = self.screen.origin
+        if self.screen.set_window(rect, self.focus.dpi_scale()):
+            self._build_geometry()
+            self.option_rows = []
+            self.last_target = None
+            if self.recorder:
+                # Records of another size cannot share the ring file
+                self.recorder.close()
+                self.recorder = None
+                print('Recording stopped: the game window was resized')
+        elif self.screen.origin != origin:
+            self.capture.window_origin = self.screen.origin
+        else:
+            return False
+        # The cursor may have been left outside the window
+        self.last_reposition = float('-inf')
+        print(f"Game window {self.screen.width}x{self.screen.height} at {self.screen.origin}, "
+              f"scale {self.screen.dpi_scale * 100:.0f}%")
+        return True
     
     def random_interval(self) -> float:
         """Returns a random interval between 0.12 and 0.2 seconds."""
         return uniform(0.18, 0.2) if randint(1, 6) == 6 else uniform(0.12, 0.18)
     
     def random_cursor_position(self) -> Tuple[int, int]:
-        """Moves the cursor to a random position within the dialogue area."""
+        """Returns a random screen position within the dialogue area of the game window."""
         x = randint(self.screen.bottom_dialogue_min_x, self.screen.bottom_dialogue_max_x)
-        y = randint(self.screen.bottom_dialogue_min_y, self.screen.bottom_dialogue_max_y)
-        return x, y
+        target = choose_option(self.option_rows, self.option_policy)
+        if target is None:
+            y = randint(self.screen.bottom_dialogue_min_y, self.screen.bottom_dialogue_max_y)
+        else:
+            # Same vertical spread as the bottom area, around the chosen option
+            half = (self.screen.bottom_dialogue_max_y - self.screen.bottom_dialogue_min_y) // 2
+            y = randint(target - half, target + half)
+        return self.screen.to_screen(x, y)
     
     def is_genshinimpact_active(self):
         """Checks if Genshin Impact is the active window."""
-        return getActiveWindowTitle() == "Genshin Impact"
+        return self.focus.focused()
     
     def is_dialogue_playing(self):
         """Checks if a dialogue is playing automatically."""
-        return pixel(self.screen.playing_icon_x, 
-                    self.screen.playing_icon_y) == COLOR_AUTOPLAY_ICON
+        return self.probe_results.get(PROBE_AUTOPLAY, False)
     
     def is_dialogue_option_available(self):
         """Checks if a dialogue option is available."""
-        if pixel(self.screen.loading_screen_x, 
-                self.screen.loading_screen_y) == COLOR_WHITE:
+        return bool(self.option_rows) or self.probe_results.get(PROBE_OPTION, False)
+    
+    def enter_state(self, state: str):
+        """Moves the game state machine, forcing a full check of the next frame."""
+        if self.game_state.enter(state):
+            # Results reused by the change gate were computed for another plan
+            self.change_gate.invalidate()
+            self.metrics.count(f'state_{state}')
+    
+    def detect(self, buffer) -> bool:
+        """Runs the checks planned for the game state and tells if a dialogue must be skipped."""
+        start = perf_counter()
+        with self.metrics.timer('detect'):
+            if self.game_state.state in (GAME_PAUSED, GAME_UNFOCUSED):
+                self.enter_state(GAME_FREE_ROAM)
+            # Skipped entirely while the captured region does not change
+            self.refreshed = self.change_gate.should_refresh(buffer)
+            if self.refreshed:
+                # A state change means the frame was only partly checked,
+                # so it is checked again with the plan of the new state
+                if self._evaluate(buffer):
+                    self._evaluate(buffer)
+            detected = self.is_dialogue_playing() or self.is_dialogue_option_available()
+        self.session_stats.detection(detected, perf_counter() - start)
+        return detected
+    
+    def _evaluate(self, buffer) -> bool:
+        """Runs the checks of the current state's plan and tells if the state changed."""
+        plan = self.state_plans[self.game_state.state]
+        # Loading screens and fades have nothing to skip
+        self.screen_state = self.transitions.classify(buffer) if plan.classify \
+            else SCREEN_GAMEPLAY
+        gameplay = self.screen_state == SCREEN_GAMEPLAY
+        self.probe_results = self.probe_sets[plan.roles].evaluate(buffer) \
+            if gameplay and plan.roles else {}
+        self.option_rows = self.options.scan(buffer) if gameplay and plan.scan_options else []
+        state = next_state(self.screen_state, self.is_dialogue_playing(),
+                           self.is_dialogue_option_available())
+        if state == self.game_state.state:
             return False
-        if pixel(self.screen.dialogue_icon_x, 
-                self.screen.dialogue_icon_lower_y) == COLOR_WHITE:
-            return True
-            
-        if pixel(self.screen.dialogue_icon_x, 
-                self.screen.dialogue_icon_higher_y) == COLOR_WHITE:
-            return True
+        self.enter_state(state)
+        return True
+    
+    def in_transition(self) -> bool:
+        """Checks if the last captured frame was a loading screen or a fade."""
+        return self.game_state.state == GAME_LOADING
+    
+    def next_interval(self, detected: bool) -> float:
+        """Returns the delay before the next tick, as planned for the current state."""
+        return self.scheduler.next_interval(detected, self.state_plans[self.game_state.state].interval)
+    
+    def dialogue_key(self) -> Tuple:
+        """Identifies the dialogue on screen, so repeated clicks on it can be coalesced."""
+        return self.game_state.state, tuple(self.option_rows)
+    
+    def actuate(self) -> bool:
+        """Clicks through the dialogue and tells if the click was sent."""
+        with self.metrics.timer('click'):
+            # Aim at the option chosen by the policy as soon as it changes,
+            # and periodically reposition the cursor to avoid bot detection
+            target = choose_option(self.option_rows, self.option_policy)
+            reposition = (target is not None and target != self.last_target) or \
+                perf_counter() - self.last_reposition > self.time_between_repositions
+            position = self.random_cursor_position() if reposition else None
+            clicked = self.dispatcher.dispatch(self.dialogue_key(), position)
+            if clicked:
+                if reposition:
+                    self.last_reposition = perf_counter()
+                    self.time_between_repositions = self.random_interval() * 40
+                self.last_target = target
+        self.metrics.count('clicks' if clicked else 'clicks_coalesced')
+        if clicked:
+            self.session_stats.count('clicks')
+        return clicked
+    
+    def tick(self) -> bool:
+        """Runs one detection pass, clicking if needed, and tells if a dialogue was found."""
+        metrics = self.metrics
+        with metrics.timer('tick'):
+            detected = clicked = False
+            buffer = None
+            with metrics.timer('focus'):
+                focused = self.is_genshinimpact_active()
+            if focused:
+                self.follow_window()
+                # One grab and one vectorized comparison answer every probe
+                with metrics.timer('capture'):
+                    buffer = self.capture.grab()
+                detected = self.detect(buffer)
+            else:
+                self.enter_state(GAME_UNFOCUSED)
+                
+            if detected:
+                metrics.count('detections')
+                clicked = self.actuate()
             
-        return False
+            if self.recorder:
+                with metrics.timer('record'):
+                    self.recorder.record(buffer if focused and self.refreshed else None,
+                                         self.game_state.state, detected, clicked,
+                                         len(self.option_rows))
+        return detected
     
     def set_status(self, new_status):
-        """Changes the status and updates the overlay."""
-        self.status = new_status
-        self.status_overlay.update_status(new_status)
+        """Changes the status, wakes the detection loop and updates the overlay."""
+        with self.status_changed:
+            self.status = new_status
+            self.status_changed.notify_all()
+        if new_status == STATUS_PAUSE:
+            self.enter_state(GAME_PAUSED)
+        elif new_status == STATUS_RUN:
+            self.dispatcher.reset()
+        with self.metrics.timer('overlay_update'):
+            self.status_overlay.update_status(new_status)
+    
+    def wait_while_paused(self):
+        """Blocks without polling until the program is resumed or closed."""
+        with self.status_changed:
+            self.status_changed.wait_for(lambda: self.status != STATUS_PAUSE)
+    
+    def wait_next_tick(self, timeout: float):
+        """Waits before the next tick, returning early if the status changes."""
+        with self.status_changed:
+            self.status_changed.wait_for(lambda: self.status != STATUS_RUN, timeout)
     
-    def on_press(self, key: Union[Key, KeyCode, None]) -> None:
+    def on_press(self, key: Union['Key', 'KeyCode', None]) -> None:
         """Handles keyboard shortcuts to control the program."""
-        key_pressed = str(key)
-        
-        if key_pressed == KEY_START:
-            self.set_status(STATUS_RUN)
-            print('ACTIVE')
-            try:
-                hdlg = win32gui.FindWindow(None, "Genshin Impact")
+        with self.metrics.timer('key'):
+            self._handle_key(str(key))
+    
+    def start(self):
+        """Resumes skipping and brings the game window to the foreground."""
+        self.set_status(STATUS_RUN)
+        print('ACTIVE')
+        try:
+            hdlg = self.focus.window_handle()
+            if hdlg:
+                import win32gui # type: ignore
+                import win32con # type: ignore
                 win32gui.SetForegroundWindow(hdlg)
                 win32gui.ShowWindow(hdlg, win32con.SW_SHOWNORMAL)
-            except Exception as e:  
-                print(f"Error bringing the window to the foreground: {e}")
+        except Exception as e:  
+            print(f"Error bringing the window to the foreground: {e}")
+    
+    def pause(self):
+        """Pauses skipping."""
+        self.set_status(STATUS_PAUSE)
+        print('PAUSED')
+    
+    def shutdown(self):
+        """Stops the detection loop and releases the overlay and the focus tracking."""
+        self.set_status(STATUS_EXIT)
+        print('Closing the program')
+        self.status_overlay.close()
+        self.focus.close()
+    
+    def state(self) -> Dict:
+        """Returns what the skipper currently sees and does."""
+        return {
+            'status': self.status,
+            'game_state': self.game_state.state,
+            'screen_state': self.screen_state,
+            'option_rows': [int(row) for row in self.option_rows],
+            'interval_s': self.scheduler.interval,
+        }
+    
+    def stats(self) -> Dict:
+        """Returns the live performance counters."""
+        stats = {
+            'polling': self.scheduler.report(),
+            'change_gate': self.change_gate.report(),
+            'states': self.game_state.report(),
+            'clicks': self.dispatcher.report(),
+        }
+        if self.metrics.enabled:
+            stats['metrics'] = self.metrics.snapshot()
+        return stats
+    
+    def _handle_key(self, key_pressed: str):
+        """Applies the action bound to a key."""
+        if key_pressed == KEY_START:
+            self.start()
         elif key_pressed == KEY_PAUSE:
-            self.set_status(STATUS_PAUSE)
-            print('PAUSED')
+            self.pause()
         elif key_pressed == KEY_EXIT:
-            self.set_status(STATUS_EXIT)
-            print('Closing the program')
-            self.status_overlay.close()
+            self.shutdown()
             sys.exit(0)
         elif key_pressed == KEY_HELP:
             print('Displaying help')
@@ -104,19 +424,35 @@ class DialogueSkipper:
               'F12 to quit\n'
               '-------------')
               
+        if self.pipelined:
+            pipeline = DetectionPipeline(self)
+            pipeline.run()
+            print('Closing the program')
+            print(pipeline.summary())
+            print(self.change_gate.summary())
+            print(self.game_state.summary())
+            print(self.dispatcher.summary())
+            if self.recorder:
+                self.recorder.close()
+            self.session_stats.close()
+            return
+        
         while True:
-            while self.status == STATUS_PAUSE:
-                sleep(0.5)
+            self.wait_while_paused()
                 
             if self.status == STATUS_EXIT:
                 print('Closing the program')
+                print(self.scheduler.summary())
+                print(self.change_gate.summary())
+                print(self.game_state.summary())
+                print(self.dispatcher.summary())
+                if self.recorder:
+                    self.recorder.close()
+                self.session_stats.close()
                 break
                 
-            if self.is_genshinimpact_active() and \
-               (self.is_dialogue_playing() or self.is_dialogue_option_available()):
-                # Periodically reposition the cursor to avoid bot detection
-                if perf_counter() - self.last_reposition > self.time_between_repositions:
-                    self.last_reposition = perf_counter()
-                    self.time_between_repositions = self.random_interval() * 40
-                    self.mouse.position = self.random_cursor_position()
-                click()
\ No newline at end of file
+            detected = self.tick()
+            self.metrics.publish()
+                
+            # Poll fast during dialogues, back off while nothing is on screen
+            self.wait_next_tick(self.next_interval(detected))
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""Module generating deterministic game screens for benchmarks and replays."""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from constants import COLOR_AUTOPLAY_ICON, COLOR_WHITE
+
+# Frame kinds of a script
+FRAME_IDLE = 'idle'
+FRAME_AUTOPLAY = 'autoplay'
+FRAME_OPTION = 'option'
+FRAME_MULTI_OPTION = 'multi_option'
+FRAME_LOADING = 'loading'
+FRAME_FADE = 'fade'
+FRAME_BRIGHT_OPTION = 'bright_option'
+
+# Frame kinds on which the skipper is expected to click
+CLICK_FRAMES = (FRAME_AUTOPLAY, FRAME_OPTION, FRAME_MULTI_OPTION, FRAME_BRIGHT_OPTION)
+
+# Frame kinds showing option icons, and the ones drawn over a bright cutscene
+OPTION_FRAMES = (FRAME_OPTION, FRAME_MULTI_OPTION, FRAME_BRIGHT_OPTION)
+BRIGHT_FRAMES = (FRAME_BRIGHT_OPTION,)
+
+# Gray levels of a bright cutscene: mostly near white, with darker bands every few columns
+BRIGHT_LEVEL = 250
+BRIGHT_BAND_LEVEL = 150
+BRIGHT_BAND_PERIOD = 10
+
+# Options shown on multi-option frames, and their spacing at 1080p
+MULTI_OPTION_COUNT = 3
+OPTION_ROW_SPACING = 72
+
+# Number of distinct idle frames, so the change gate sees a moving scene
+IDLE_VARIANTS = 4
+
+# Scripted sequences of (frame kind, number of frames)
+SCENARIOS: Dict[str, List[Tuple[str, int]]] = {
+    'autoplay': [(FRAME_IDLE, 20), (FRAME_AUTOPLAY, 120), (FRAME_IDLE, 20)],
+    'option': [(FRAME_IDLE, 20), (FRAME_OPTION, 40), (FRAME_IDLE, 20), (FRAME_OPTION, 40)],
+    'loading': [(FRAME_IDLE, 10), (FRAME_LOADING, 150), (FRAME_IDLE, 10)],
+    'transition': [(FRAME_IDLE, 10), (FRAME_FADE, 30), (FRAME_LOADING, 60), (FRAME_FADE, 30),
+                   (FRAME_BRIGHT_OPTION, 40), (FRAME_IDLE, 10)],
+    'idle': [(FRAME_IDLE, 200)],
+    'choice': [(FRAME_IDLE, 20), (FRAME_MULTI_OPTION, 40), (FRAME_OPTION, 20), (FRAME_IDLE, 20)],
+    'mixed': [(FRAME_IDLE, 30), (FRAME_AUTOPLAY, 60), (FRAME_OPTION, 10),
+              (FRAME_AUTOPLAY, 40), (FRAME_LOADING, 40), (FRAME_IDLE, 30),
+              (FRAME_OPTION, 10), (FRAME_IDLE, 30)],
+}
+
+class FakeGame:
+    """Renders synthetic game frames laid out with the coordinates of a ScreenSetup."""
+
+    def __init__(self, screen_setup, seed: int = 0):
+        """
+        Initializes the renderer.
+
+        Args:
+            screen_setup: ScreenSetup giving the resolution and probe coordinates
+            seed: Seed of the background noise, for reproducible frames
+        """
+        self.screen = screen_setup
+        self.rng = np.random.default_rng(seed)
+        self.icon_radius = max(2, screen_setup.height // 360)
+        self._cache: Dict[str, List[np.ndarray]] = {}
+
+    def background(self) -> np.ndarray:
+        """Returns a gameplay-like frame that matches none of the probe colors."""
+        height, width = self.screen.height, self.screen.width
+        gradient = np.linspace(40, 160, width, dtype=np.float32)[None, :, None]
+        noise = self.rng.integers(0, 20, size=(height, width, 3), dtype=np.uint8)
+        return (np.broadcast_to(gradient, (height, width, 3)) + noise).astype(np.uint8)
+
+    def bright_background(self) -> np.ndarray:
+        """Returns a bright, contrasted cutscene frame that is not a loading screen."""
+        height, width = self.screen.height, self.screen.width
+        frame = np.full((height, width, 3), BRIGHT_LEVEL, dtype=np.uint8)
+        frame[:, ::BRIGHT_BAND_PERIOD] = BRIGHT_BAND_LEVEL
+        return frame
+
+    def _draw_square(self, frame: np.ndarray, x: int, y: int, color: Sequence[int]):
+        """Draws an icon-sized square centered on a game coordinate."""
+        r = self.icon_radius
+        frame[max(0, y - r):y + r + 1, max(0, x - r):x + r + 1] = color
+
+    def render(self, kind: str) -> np.ndarray:
+        """Renders a new frame of the given kind."""
+        if kind == FRAME_LOADING:
+            return np.full((self.screen.height, self.screen.width, 3), COLOR_WHITE, dtype=np.uint8)
+        if kind == FRAME_FADE:
+            return np.zeros((self.screen.height, self.screen.width, 3), dtype=np.uint8)
+
+        frame = self.bright_background() if kind in BRIGHT_FRAMES else self.background()
+        s = self.screen
+        if kind == FRAME_AUTOPLAY:
+            self._draw_square(frame, s.playing_icon_x, s.playing_icon_y, COLOR_AUTOPLAY_ICON)
+        elif kind in OPTION_FRAMES:
+            # The bottom option icon spans both dialogue icon probes,
+            # the other options are stacked above it
+            r = self.icon_radius
+            count = MULTI_OPTION_COUNT if kind == FRAME_MULTI_OPTION else 1
+            spacing = s.height_adjust(OPTION_ROW_SPACING)
+            for i in range(count):
+                top = s.dialogue_icon_higher_y - r - i * spacing
+                bottom = s.dialogue_icon_lower_y + r + 1 - i * spacing
+                frame[top:bottom, s.dialogue_icon_x - r:s.dialogue_icon_x + r + 1] = COLOR_WHITE
+        elif kind != FRAME_IDLE:
+            raise ValueError(f"Unknown frame kind: {kind}")
+        return frame
+
+    def option_rows(self, kind: str) -> List[int]:
+        """Returns the screen y of the center of each option icon drawn on a frame kind."""
+        if kind not in OPTION_FRAMES:
+            return []
+        s = self.screen
+        count = MULTI_OPTION_COUNT if kind == FRAME_MULTI_OPTION else 1
+        center = (s.dialogue_icon_higher_y + s.dialogue_icon_lower_y) // 2
+        spacing = s.height_adjust(OPTION_ROW_SPACING)
+        return [center - i * spacing for i in reversed(range(count))]
+
+    def frames(self, kind: str) -> List[np.ndarray]:
+        """Returns the cached variants rendered for a frame kind."""
+        if kind not in self._cache:
+            variants = IDLE_VARIANTS if kind == FRAME_IDLE else 1
+            self._cache[kind] = [self.render(kind) for _ in range(variants)]
+        return self._cache[kind]
+
+    def render_script(self, script: List[Tuple[str, int]]) -> Tuple[List[np.ndarray], List[str]]:
+        """
+        Expands a script into frames sharing the cached renders.
+
+        Returns:
+            The frames and the kind of each frame
+        """
+        frames, kinds = [], []
+        for kind, count in script:
+            variants = self.frames(kind)
+            for i in range(count):
+                frames.append(variants[i % len(variants)])
+                kinds.append(kind)
+        return frames, kinds
@@ -0,0 +1,50 @@
+"""Module remembering the family name of the overlay font between runs."""
+
+import hashlib
+import json
+import os
+from typing import Optional
+
+from constants import FONT_CACHE_FILE
+
+def font_file_hash(path: str) -> str:
+    """Returns the SHA-1 of a font file."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FontFamilyCache:
+    """Small file mapping font file hashes to the family names they registered."""
+
+    def __init__(self, path: str = FONT_CACHE_FILE):
+        """
+        Loads the cache file.
+
+        Args:
+            path: Location of the JSON cache file
+        """
+        self.path = path
+        self.families = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.families = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable font cache: {e}")
+
+    def get(self, font_hash: str) -> Optional[str]:
+        """Returns the family resolved for a font file, or None if it must be searched."""
+        return self.families.get(font_hash)
+
+    def store(self, font_hash: str, family: str):
+        """Remembers the family of a font file and saves the cache."""
+        # Only the current font file matters, older entries are dropped
+        self.families = {font_hash: family}
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.families, f)
+        except OSError as e:
+            print(f"Error saving the font cache: {e}")
@@ -0,0 +1,201 @@
+"""Module providing the screen frames and window focus used by detection."""
+
+import ctypes
+import os
+import sys
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+GAME_WINDOW_TITLE = "Genshin Impact"
+
+# Constants for Windows API
+SRCCOPY = 0x00CC0020
+CAPTUREBLT = 0x40000000
+DIB_RGB_COLORS = 0
+
+def load_frame(path: str) -> np.ndarray:
+    """Loads a PNG screenshot or a NumPy frame as RGB pixels."""
+    if path.lower().endswith('.npy'):
+        return np.load(path)
+    from PIL import Image
+    with Image.open(path) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+class FrameSource:
+    """Base class for the backends feeding frames and window titles to the skipper."""
+
+    def grab(self, bbox: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        Returns the pixels of a screen region.
+
+        Args:
+            bbox: Region as (left, top, right, bottom) in screen coordinates
+
+        Returns:
+            np.ndarray: RGB pixels of the region with shape (height, width, 3)
+        """
+        raise NotImplementedError
+
+    def active_window_title(self) -> str:
+        """Returns the title of the window currently in the foreground."""
+        raise NotImplementedError
+
+
+class GdiRegionGrabber:
+    """
+    Copies one screen region with BitBlt into a reused bitmap (Windows only).
+
+    Only the region is read, on any monitor: coordinates are those of the
+    virtual screen, negative left of or above the primary monitor.
+    """
+
+    def __init__(self):
+        """Gets the screen device context."""
+        from ctypes import wintypes
+        self._user32 = user32 = ctypes.WinDLL('user32')
+        self._gdi32 = gdi32 = ctypes.WinDLL('gdi32')
+        user32.GetDC.argtypes = [wintypes.HWND]
+        user32.GetDC.restype = wintypes.HDC
+        user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+        gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
+        gdi32.CreateCompatibleDC.restype = wintypes.HDC
+        gdi32.CreateDIBSection.argtypes = [wintypes.HDC, ctypes.c_void_p, wintypes.UINT,
+                                           ctypes.POINTER(ctypes.c_void_p), wintypes.HANDLE,
+                                           wintypes.DWORD]
+        gdi32.CreateDIBSection.restype = wintypes.HBITMAP
+        gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+        gdi32.SelectObject.restype = wintypes.HGDIOBJ
+        gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+        gdi32.DeleteDC.argtypes = [wintypes.HDC]
+        gdi32.BitBlt.argtypes = [wintypes.HDC, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                 ctypes.c_int, wintypes.HDC, ctypes.c_int, ctypes.c_int,
+                                 wintypes.DWORD]
+        self.screen_dc = user32.GetDC(None)
+        self.memory_dc = gdi32.CreateCompatibleDC(self.screen_dc)
+        self.bitmap = None
+        self.pixels = None
+
+    def _allocate(self, width: int, height: int):
+        """Creates a top-down 32-bit bitmap of the region size, mapped as a NumPy array."""
+        header = (ctypes.c_int32 * 11)(40, width, -height, 1 | 32 << 16)  # BITMAPINFO
+        bits = ctypes.c_void_p()
+        bitmap = self._gdi32.CreateDIBSection(self.memory_dc, header, DIB_RGB_COLORS,
+                                              ctypes.byref(bits), None, 0)
+        if not bitmap:
+            raise OSError("Could not create the capture bitmap")
+        self._gdi32.SelectObject(self.memory_dc, bitmap)
+        if self.bitmap:
+            self._gdi32.DeleteObject(self.bitmap)
+        self.bitmap = bitmap
+        buffer = (ctypes.c_uint8 * (width * height * 4)).from_address(bits.value)
+        self.pixels = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 4)
+
+    def grab(self, bbox: Tuple[int, int, int, int]) -> np.ndarray:
+        """Returns the RGB pixels of a region of the virtual screen."""
+        left, top, right, bottom = bbox
+        if self.pixels is None or self.pixels.shape[:2] != (bottom - top, right - left):
+            self._allocate(right - left, bottom - top)
+        if not self._gdi32.BitBlt(self.memory_dc, 0, 0, right - left, bottom - top,
+                                  self.screen_dc, left, top, SRCCOPY | CAPTUREBLT):
+            raise OSError("Screen capture failed")
+        self._gdi32.GdiFlush()
+        # BGRA to RGB, copied out of the reused bitmap
+        return np.ascontiguousarray(self.pixels[..., 2::-1])
+
+    def close(self):
+        """Releases the bitmap and the device contexts."""
+        if self.bitmap:
+            self._gdi32.DeleteObject(self.bitmap)
+            self.bitmap = self.pixels = None
+        self._gdi32.DeleteDC(self.memory_dc)
+        self._user32.ReleaseDC(None, self.screen_dc)
+
+
+class LiveFrameSource(FrameSource):
+    """Backend reading the real screen and foreground window."""
+
+    def __init__(self):
+        """Imports the desktop backends only when the live source is used."""
+        from pyautogui import getActiveWindowTitle
+        if sys.platform == 'win32':
+            self._grab = GdiRegionGrabber().grab
+        else:
+            from PIL import ImageGrab
+            self._grab = lambda bbox: np.asarray(ImageGrab.grab(bbox=bbox).convert('RGB'))
+        self._get_active_window_title = getActiveWindowTitle
+
+    def grab(self, bbox):
+        """Grabs the region from the screen."""
+        return self._grab(bbox)
+
+    def active_window_title(self):
+        """Queries the title of the foreground window."""
+        return self._get_active_window_title() or ""
+
+
+class ReplayFrameSource(FrameSource):
+    """Backend replaying recorded full-screen frames and window-title events."""
+
+    def __init__(self, frames: List[np.ndarray], titles: Optional[Dict[int, str]] = None,
+                 loop: bool = False):
+        """
+        Initializes the replay from frames already loaded in memory.
+
+        Args:
+            frames: Full-screen RGB frames, replayed one per grab
+            titles: Window title changes keyed by the frame index where they start
+            loop: If True, the replay restarts from the first frame when exhausted
+        """
+        if not frames:
+            raise ValueError("A replay needs at least one frame")
+        self.frames = frames
+        self.titles = titles if titles is not None else {0: GAME_WINDOW_TITLE}
+        self._title_starts = sorted(self.titles)
+        self.loop = loop
+        self.position = 0
+        self.finished = False
+
+    @classmethod
+    def from_directory(cls, directory: str, loop: bool = False) -> 'ReplayFrameSource':
+        """
+        Loads a replay from a directory of PNG or NumPy frames.
+
+        Frames are replayed in file name order. An optional window_titles.txt
+        file holds one "<frame index> <window title>" event per line.
+        """
+        frames = [load_frame(os.path.join(directory, name))
+                  for name in sorted(os.listdir(directory))
+                  if name.lower().endswith(('.png', '.npy'))]
+
+        titles = None
+        titles_path = os.path.join(directory, 'window_titles.txt')
+        if os.path.exists(titles_path):
+            titles = {}
+            with open(titles_path, encoding='utf-8') as f:
+                for line in f:
+                    line = line.rstrip('\r\n')
+                    if line.strip():
+                        index, _, title = line.partition(' ')
+                        titles[int(index)] = title
+        return cls(frames, titles, loop)
+
+    def active_window_title(self):
+        """Returns the title in effect for the current frame."""
+        i = bisect_right(self._title_starts, self.position)
+        return self.titles[self._title_starts[i - 1]] if i else ""
+
+    def grab(self, bbox):
+        """Crops the region from the current frame and moves to the next one."""
+        left, top, right, bottom = bbox
+        frame = self.frames[self.position]
+        if self.position + 1 < len(self.frames):
+            self.position += 1
+        elif self.loop:
+            self.position = 0
+        else:
+            self.finished = True
+        return frame[top:bottom, left:right]
+
@@ -0,0 +1,100 @@
+"""Module tracking the state of the game to decide what each tick checks."""
+
+from collections import Counter
+from threading import Lock
+from time import perf_counter
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from constants import (PROBE_AUTOPLAY, PROBE_OPTION, SCREEN_GAMEPLAY,
+                     GAME_PAUSED, GAME_UNFOCUSED, GAME_LOADING,
+                     GAME_FREE_ROAM, GAME_AUTOPLAY, GAME_OPTION)
+
+class StatePlan(NamedTuple):
+    """What a tick checks in one state, and how long to wait after it."""
+    classify: bool  # Run the loading screen / fade classifier
+    roles: Tuple[str, ...]  # Probe roles to evaluate
+    scan_options: bool  # Scan the option column
+    interval: Optional[float]  # Fixed delay in seconds, None for the adaptive backoff
+
+
+def build_state_plans(scheduler) -> Dict[str, StatePlan]:
+    """
+    Builds the plan of every state from the polling bounds of a scheduler.
+
+    Once a state is confirmed only the checks able to leave it are run: while
+    autoplay is shown only its icon is rechecked, and while loading only the
+    classifier runs.
+    """
+    idle = StatePlan(False, (), False, scheduler.max_interval)
+    return {
+        GAME_PAUSED: idle,
+        GAME_UNFOCUSED: idle,
+        GAME_LOADING: StatePlan(True, (), False, scheduler.transition_interval),
+        GAME_FREE_ROAM: StatePlan(True, (PROBE_AUTOPLAY, PROBE_OPTION), True, None),
+        GAME_AUTOPLAY: StatePlan(False, (PROBE_AUTOPLAY,), False, scheduler.min_interval),
+        GAME_OPTION: StatePlan(True, (PROBE_AUTOPLAY, PROBE_OPTION), True, scheduler.min_interval),
+    }
+
+
+def next_state(screen_state: str, autoplay: bool, options: bool) -> str:
+    """Returns the state matching the results of a detection pass."""
+    if screen_state != SCREEN_GAMEPLAY:
+        return GAME_LOADING
+    if autoplay:
+        return GAME_AUTOPLAY
+    if options:
+        return GAME_OPTION
+    return GAME_FREE_ROAM
+
+
+class GameStateMachine:
+    """Current game state with its dwell times and transition counts."""
+
+    def __init__(self, initial: str = GAME_PAUSED):
+        """
+        Initializes the machine.
+
+        Args:
+            initial: State the machine starts in
+        """
+        self.state = initial
+        self.entered_at = perf_counter()
+        self.dwell: Dict[str, float] = Counter()
+        self.transitions: Dict[Tuple[str, str], int] = Counter()
+        # The key listener and the detection thread both change the state
+        self.lock = Lock()
+
+    def enter(self, state: str) -> bool:
+        """
+        Moves to a state.
+
+        Returns:
+            bool: True if the state changed
+        """
+        with self.lock:
+            if state == self.state:
+                return False
+            now = perf_counter()
+            self.dwell[self.state] += now - self.entered_at
+            self.transitions[(self.state, state)] += 1
+            self.state = state
+            self.entered_at = now
+            return True
+
+    def report(self) -> Dict:
+        """Returns the dwell time of each state and the count of each transition."""
+        with self.lock:
+            dwell = Counter(self.dwell)
+            dwell[self.state] += perf_counter() - self.entered_at
+            return {
+                'state': self.state,
+                'dwell_s': dict(dwell),
+                'transitions': {f'{a}->{b}': n for (a, b), n in self.transitions.items()},
+            }
+
+    def summary(self) -> str:
+        """Formats the dwell times and the number of transitions as a single line."""
+        r = self.report()
+        dwell = ', '.join(f'{state} {seconds:.1f} s' for state, seconds in
+                          sorted(r['dwell_s'].items(), key=lambda item: -item[1]))
+        return f"States: {dwell}; {sum(r['transitions'].values())} transitions"
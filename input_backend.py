@@ -0,0 +1,54 @@
+"""Module sending the mouse input that skips dialogues."""
+
+from time import perf_counter
+from typing import List, Tuple
+
+class InputSink:
+    """Base class for the backends receiving clicks and cursor moves."""
+
+    def click(self):
+        """Clicks at the current cursor position."""
+        raise NotImplementedError
+
+    def move(self, position: Tuple[int, int]):
+        """Moves the cursor to a screen position."""
+        raise NotImplementedError
+
+
+class LiveInputSink(InputSink):
+    """Backend driving the real mouse."""
+
+    def __init__(self):
+        """Imports the input backends only when the live sink is used."""
+        from pyautogui import click
+        from pynput.mouse import Controller # type: ignore
+        self._click = click
+        self.mouse = Controller()
+
+    def click(self):
+        """Clicks with pyautogui."""
+        self._click()
+
+    def move(self, position):
+        """Moves the cursor with pynput."""
+        self.mouse.position = position
+
+
+class FakeInputSink(InputSink):
+    """In-memory backend recording every click and cursor move with its time."""
+
+    def __init__(self):
+        """Initializes the empty records."""
+        self.clicks: List[float] = []
+        self.moves: List[Tuple[float, Tuple[int, int]]] = []
+        self.position = (0, 0)
+
+    def click(self):
+        """Records a click."""
+        self.clicks.append(perf_counter())
+
+    def move(self, position):
+        """Records a cursor move."""
+        self.position = position
+        self.moves.append((perf_counter(), position))
+
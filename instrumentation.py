@@ -0,0 +1,178 @@
+"""Module timing the phases of the detection loop with low-overhead histograms."""
+
+import json
+import os
+from collections import defaultdict
+from time import perf_counter, time
+from typing import Callable, Dict, List
+
+from constants import METRICS_FILE, METRICS_INTERVAL
+
+HISTOGRAM_BUCKETS = 40  # Power-of-two microsecond buckets, up to ~9 minutes
+
+class LatencyHistogram:
+    """Histogram of durations in power-of-two microsecond buckets."""
+
+    def __init__(self):
+        """Initializes the empty histogram."""
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """Adds one duration."""
+        bucket = int(seconds * 1000000).bit_length()
+        self.buckets[min(bucket, HISTOGRAM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Returns the upper bound in seconds of the bucket holding the q-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min((1 << bucket) / 1000000, self.max)
+        return self.max
+
+    def as_dict(self) -> Dict[str, float]:
+        """Returns the summary of the histogram with durations in milliseconds."""
+        mean = self.total / self.count if self.count else 0.0
+        return {
+            'count': self.count,
+            'mean_ms': mean * 1000,
+            'max_ms': self.max * 1000,
+            'p50_ms': self.percentile(50) * 1000,
+            'p95_ms': self.percentile(95) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+        }
+
+
+class _PhaseTimer:
+    """Context manager recording the duration of one phase into its histogram."""
+
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: LatencyHistogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        self.histogram.record(perf_counter() - self.start)
+
+
+class _NullTimer:
+    """Context manager doing nothing, shared by every phase when timing is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class NullInstrumentation:
+    """Instrumentation turned off: every call is a no-op."""
+
+    enabled = False
+
+    def timer(self, phase: str):
+        """Returns the shared do-nothing timer."""
+        return _NULL_TIMER
+
+    def count(self, name: str, n: int = 1):
+        """Ignores the counter."""
+
+    def publish(self):
+        """Nothing to publish."""
+
+    def subscribe(self, callback: Callable[['Instrumentation'], None]):
+        """Nothing will be published."""
+
+
+class Instrumentation(NullInstrumentation):
+    """Phase histograms and counters, periodically written to a JSON snapshot file."""
+
+    enabled = True
+
+    def __init__(self, snapshot_path: str = METRICS_FILE, interval: float = METRICS_INTERVAL):
+        """
+        Initializes the empty histograms.
+
+        Args:
+            snapshot_path: JSON file rewritten with the latest snapshot, or None
+            interval: Seconds between two snapshots
+        """
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self._timers: Dict[str, _PhaseTimer] = {}
+        self._subscribers: List[Callable[['Instrumentation'], None]] = []
+        self.started_at = perf_counter()
+        self.published_at = self.started_at
+
+    def timer(self, phase):
+        """Returns the reusable timer of a phase."""
+        timer = self._timers.get(phase)
+        if timer is None:
+            timer = self._timers[phase] = _PhaseTimer(self.histograms[phase])
+        return timer
+
+    def count(self, name, n=1):
+        """Increments a counter."""
+        self.counters[name] += n
+
+    def subscribe(self, callback):
+        """Registers a callback called with the instrumentation on every snapshot."""
+        self._subscribers.append(callback)
+
+    def snapshot(self) -> Dict:
+        """Returns the current histograms and counters."""
+        return {
+            'timestamp': time(),
+            'uptime_s': perf_counter() - self.started_at,
+            'phases': {name: h.as_dict() for name, h in list(self.histograms.items())},
+            'counters': dict(self.counters),
+        }
+
+    def overlay_line(self) -> str:
+        """Formats the tick latency for the status overlay."""
+        tick = self.histograms['tick']
+        return (f"tick {tick.total / max(tick.count, 1) * 1000:.1f} ms "
+                f"p95 {tick.percentile(95) * 1000:.1f} ms")
+
+    def publish(self):
+        """Writes a snapshot and notifies the subscribers once the interval has elapsed."""
+        now = perf_counter()
+        if now - self.published_at < self.interval:
+            return
+        self.published_at = now
+        if self.snapshot_path:
+            self.write_snapshot(self.snapshot_path)
+        for callback in self._subscribers:
+            callback(self)
+
+    def write_snapshot(self, path: str):
+        """Atomically replaces a JSON file with the current snapshot."""
+        temp_path = path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing metrics snapshot: {e}")
@@ -0,0 +1,115 @@
+"""Module persisting the probe and click geometry computed for each resolution."""
+
+import hashlib
+import json
+import os
+from math import gcd
+from typing import Callable, Dict, Optional
+
+from constants import LAYOUT_FILE_VERSION
+
+# ScreenSetup attributes making up a layout
+LAYOUT_FIELDS = (
+    'bottom_dialogue_min_x', 'bottom_dialogue_max_x',
+    'bottom_dialogue_min_y', 'bottom_dialogue_max_y',
+    'playing_icon_x', 'playing_icon_y',
+    'dialogue_icon_x', 'dialogue_icon_lower_y', 'dialogue_icon_higher_y',
+)
+
+def formula_hash(*functions: Callable) -> str:
+    """
+    Fingerprints the functions computing a layout.
+
+    The bytecode, constants and names of each function are hashed, so any change
+    to the formulas or their magic factors invalidates the cached profiles
+    without reading the source files.
+    """
+    digest = hashlib.sha1(str(LAYOUT_FILE_VERSION).encode())
+    for function in functions:
+        code = function.__code__
+        digest.update(code.co_code)
+        digest.update(repr(code.co_consts).encode())
+        digest.update(repr(code.co_names).encode())
+    return digest.hexdigest()[:16]
+
+
+def resolution_key(width: int, height: int) -> str:
+    """Returns the key of a resolution in the profile file."""
+    return f'{width}x{height}'
+
+
+def aspect_ratio(width: int, height: int) -> str:
+    """Returns the reduced aspect ratio of a resolution, e.g. 16:9."""
+    divisor = gcd(width, height)
+    return f'{width // divisor}:{height // divisor}'
+
+
+class LayoutProfileCache:
+    """Versioned file of computed layouts with per-resolution manual overrides."""
+
+    def __init__(self, path: str, formula: str):
+        """
+        Loads the profile file.
+
+        Args:
+            path: Location of the JSON profile file
+            formula: Fingerprint of the current layout formulas
+        """
+        self.path = path
+        self.formula = formula
+        self.profiles: Dict[str, Dict[str, int]] = {}
+        self.overrides: Dict[str, Dict[str, int]] = {}
+        self._load()
+
+    def _load(self):
+        """Reads the file, dropping computed profiles made by other formulas."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable layout profiles: {e}")
+            return
+        # Manual overrides survive formula changes, computed profiles do not
+        self.overrides = data.get('overrides', {})
+        if data.get('version') == LAYOUT_FILE_VERSION and data.get('formula') == self.formula:
+            self.profiles = data.get('profiles', {})
+
+    def get(self, width: int, height: int) -> Optional[Dict[str, int]]:
+        """Returns the cached layout of a resolution, or None if it must be computed."""
+        return self.profiles.get(resolution_key(width, height))
+
+    def override(self, width: int, height: int) -> Dict[str, int]:
+        """Returns the manual coordinate overrides of a resolution."""
+        return self.overrides.get(resolution_key(width, height), {})
+
+    def store(self, width: int, height: int, layout: Dict[str, int]):
+        """Adds a computed layout and saves the file."""
+        profile = dict(layout)
+        profile['aspect'] = aspect_ratio(width, height)
+        self.profiles[resolution_key(width, height)] = profile
+        self.save()
+
+    def set_override(self, width: int, height: int, overrides: Dict[str, int]):
+        """Merges manual coordinates into the overrides of a resolution and saves the file."""
+        self.overrides.setdefault(resolution_key(width, height), {}).update(overrides)
+        self.save()
+
+    def save(self):
+        """Atomically replaces the profile file."""
+        data = {
+            'version': LAYOUT_FILE_VERSION,
+            'formula': self.formula,
+            'profiles': self.profiles,
+            'overrides': self.overrides,
+        }
+        # One temporary file per process, as window workers may save at the same time
+        temporary = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            # Readers never see a partly written file
+            os.replace(temporary, self.path)
+        except OSError as e:
+            print(f"Error saving layout profiles: {e}")
@@ -3,21 +3,74 @@ Crabe Dialogue Skipper
 Program to automatically skip dialogues in Genshin Impact.
 """
 
+import argparse
 import os
 import sys
 from threading import Thread
-from pynput.keyboard import Listener # type: ignore
+
+from dotenv import load_dotenv # type: ignore
 
 from screen_setup import ScreenSetup  
 from dialogue_skipper import DialogueSkipper
-from constants import STATUS_EXIT
+from window_tracker import enable_dpi_awareness
+from constants import (STATUS_EXIT, CONTROL_HOST, CONTROL_PORT, STATS_CLOSE_TIMEOUT,
+                       PROFILE_FILE, PROFILE_TICKS)
+
+def parse_arguments() -> argparse.Namespace:
+    """Parses the profiling options of the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--profile', action='store_true',
+                        help='sample the running program and write its stacks when closing')
+    parser.add_argument('--profile-frames', metavar='DIR',
+                        help='only profile detection ticks on a directory of saved frames')
+    parser.add_argument('--profile-ticks', type=int, default=PROFILE_TICKS, metavar='N',
+                        help=f'ticks run with --profile-frames (default {PROFILE_TICKS})')
+    parser.add_argument('--profile-output', default=PROFILE_FILE, metavar='PATH',
+                        help=f'collapsed stack file for flame graphs (default {PROFILE_FILE})')
+    return parser.parse_args()
+
+
+def run_supervisor():
+    """Runs one skipper per game window, all driven by the same keyboard shortcuts."""
+    from pynput.keyboard import Listener # type: ignore
+    from supervisor import Supervisor
+    from window_tracker import Win32FocusProvider
+    
+    supervisor = Supervisor(Win32FocusProvider())
+    print(f'{len(supervisor.windows)} game windows found\n'
+          '-------------\n'
+          'F8 to start\n'
+          'F9 to pause\n'
+          'F12 to quit\n'
+          '-------------')
+    listener = Listener(on_press=supervisor.on_press)
+    listener.start()
+    results = supervisor.run()
+    listener.stop()
+    print(supervisor.summary(results))
+
 
 def main():
     """Main function initializing and running the program."""
+    args = parse_arguments()
+    # Every setting below, and in the worker processes, is read from the environment
+    load_dotenv()
+    if args.profile_frames:
+        from profiler import profile_frames
+        profile_frames(args.profile_frames, args.profile_ticks, args.profile_output)
+        return
+    
+    # Physical pixels everywhere, whatever the display scale of each monitor
+    enable_dpi_awareness()
     try:
         os.system('cls')
         print('Welcome to Crabe Dialogue Skipper\n')
         
+        # Several game clients on one machine
+        if os.getenv('MULTI_WINDOW', '0') == '1':
+            run_supervisor()
+            return
+        
         screen_setup = ScreenSetup()
         skipper = DialogueSkipper(screen_setup)
         
@@ -25,9 +78,29 @@ def main():
         skipper_thread = Thread(target=skipper.run, daemon=True)
         skipper_thread.start()
         
-        # Listening for keyboard events
-        listener = Listener(on_press=skipper.on_press)
-        listener.start()
+        # Samples every thread, the detection loop and its helpers included
+        profiler = None
+        if args.profile:
+            from profiler import SamplingProfiler
+            profiler = SamplingProfiler()
+            profiler.start()
+        
+        # Local control API for scripts and other tools
+        server = None
+        if os.getenv('CONTROL', '0') == '1':
+            from control_server import ControlServer
+            server = ControlServer(skipper, os.getenv('CONTROL_HOST', CONTROL_HOST),
+                                   int(os.getenv('CONTROL_PORT', CONTROL_PORT)),
+                                   os.getenv('CONTROL_SOCKET') or None)
+            server.start()
+            print(f"Control server listening on {server.address}")
+        
+        # Listening for keyboard events, unless the instance is driven by the control API
+        listener = None
+        if os.getenv('HOTKEYS', '1') == '1':
+            from pynput.keyboard import Listener # type: ignore
+            listener = Listener(on_press=skipper.on_press)
+            listener.start()
         
         # Keep the program active until it is explicitly stopped
         try:
@@ -37,7 +110,17 @@ def main():
             print("\nInterruption detected. Closing the program...")
             skipper.set_status(STATUS_EXIT)
             
-        listener.stop()  # Proper shutdown of the listener
+        if listener:
+            listener.stop()  # Proper shutdown of the listener
+        if server:
+            server.stop()
+        # The detection loop writes the last session statistics as it ends
+        skipper_thread.join(STATS_CLOSE_TIMEOUT)
+        if profiler:
+            profiler.stop()
+            profiler.write_collapsed(args.profile_output)
+            print(f"Collapsed stacks written to {args.profile_output}\n")
+            print(profiler.summary())
         if hasattr(skipper, 'status_overlay'):
             skipper.status_overlay.close()
             
@@ -0,0 +1,106 @@
+"""Module finding every visible dialogue option and choosing the one to click."""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from constants import (COLOR_WHITE, PROBE_TOLERANCE, OPTION_POLICY_BOTTOM,
+                     OPTION_POLICY_TOP)
+
+def icon_height_limits(height: int) -> Tuple[int, int]:
+    """Returns the (min, max) height in pixels of an option icon at a screen height."""
+    scale = height / 1080
+    min_height = max(2, int(6 * scale))
+    return min_height, max(min_height, int(40 * scale))
+
+
+class OptionDetector:
+    """Run-length scan of the dialogue option icon column."""
+
+    def __init__(self, screen_setup, tolerance: int = PROBE_TOLERANCE):
+        """
+        Computes the scanned column from the screen configuration.
+
+        Args:
+            screen_setup: ScreenSetup giving the icon position and resolution
+            tolerance: Per-channel tolerance below pure white
+        """
+        scale = screen_setup.height / 1080
+        self.min_height, self.max_height = icon_height_limits(screen_setup.height)
+        self.half_width = max(1, int(2 * scale))
+        self.x = screen_setup.dialogue_icon_x
+        self.top = int(screen_setup.height * 0.4)
+        self.bottom = min(screen_setup.height, screen_setup.dialogue_icon_lower_y + self.max_height)
+        self.threshold = np.array(COLOR_WHITE, dtype=np.int16) - tolerance
+        self.rows: List[int] = []
+        self.set_origin(0, 0)
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """Returns the scanned column as (left, top, right, bottom) game coordinates."""
+        return (max(0, self.x - self.half_width), self.top,
+                self.x + self.half_width + 1, self.bottom)
+
+    def set_origin(self, left: int, top: int):
+        """Sets the game coordinates of the top-left pixel of the scanned buffers."""
+        x0, y0, x1, y1 = self.bounds
+        self._slice = (slice(y0 - top, y1 - top), slice(x0 - left, x1 - left))
+        self._offset = y0
+        self._origin = (left, top)
+
+    def sample_points(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the buffer rows and columns of the icon center line, for change detection."""
+        left, top = self._origin
+        rows = np.arange(self.top, self.bottom, dtype=np.intp) - top
+        return rows, np.full(len(rows), self.x - left, dtype=np.intp)
+
+    @property
+    def scanned_region(self) -> Tuple[int, int, int, int]:
+        """Returns the scanned column as (left, top, right, bottom) buffer coordinates."""
+        rows, cols = self._slice
+        return cols.start, rows.start, cols.stop, rows.stop
+
+    def scan(self, buffer: np.ndarray) -> List[int]:
+        """
+        Finds the option icons in a captured buffer.
+
+        Returns:
+            List[int]: Game y of the center of each option icon, from top to bottom
+        """
+        column = buffer[self._slice]
+        white = (column >= self.threshold).all(axis=2).any(axis=1)
+        edges = np.flatnonzero(np.diff(white, prepend=False, append=False))
+        starts, ends = edges[0::2], edges[1::2]
+        lengths = ends - starts
+        keep = (lengths >= self.min_height) & (lengths <= self.max_height)
+        self.rows = ((starts[keep] + ends[keep] - 1) // 2 + self._offset).tolist()
+        return self.rows
+
+
+def parse_policy(value: str) -> str:
+    """Validates an option policy: 'bottom', 'top', or the index of an option from the top."""
+    value = value.strip().lower()
+    if value in (OPTION_POLICY_BOTTOM, OPTION_POLICY_TOP) or value.isdigit():
+        return value
+    raise ValueError(f"Unknown dialogue option policy: {value}")
+
+
+def choose_option(rows: List[int], policy: str) -> Optional[int]:
+    """
+    Picks the option to click.
+
+    Args:
+        rows: Game y of each visible option, from top to bottom
+        policy: 'bottom', 'top', or the index N of an option counted from the top;
+                an index past the last option selects the bottom one
+
+    Returns:
+        The game y of the chosen option, or None if no option is visible
+    """
+    if not rows:
+        return None
+    if policy == OPTION_POLICY_TOP:
+        return rows[0]
+    if policy == OPTION_POLICY_BOTTOM:
+        return rows[-1]
+    return rows[min(int(policy), len(rows) - 1)]
@@ -0,0 +1,93 @@
+"""Module hosting the status overlay in its own process."""
+
+import multiprocessing
+from queue import Full
+
+# Messages sent to the overlay process
+MESSAGE_STATUS = 'status'
+MESSAGE_KEYBINDINGS = 'keybindings'
+MESSAGE_METRICS = 'metrics'
+MESSAGE_CLOSE = 'close'
+
+# Seconds given to the overlay process to close before it is terminated
+CLOSE_TIMEOUT = 2.0
+
+def create_status_overlay():
+    """Creates the Tk status overlay, importing tkinter only in the overlay process."""
+    from status_overlay import StatusOverlay
+    return StatusOverlay()
+
+
+def _serve(messages, factory):
+    """
+    Overlay process: applies the messages received until asked to close.
+
+    Args:
+        messages: Queue of (kind, argument) tuples
+        factory: Module-level callable creating the overlay
+    """
+    overlay = factory()
+    while True:
+        try:
+            kind, argument = messages.get()
+        except (EOFError, OSError):
+            # The detection process is gone
+            kind, argument = MESSAGE_CLOSE, None
+        if kind == MESSAGE_STATUS:
+            overlay.update_status(argument)
+        elif kind == MESSAGE_KEYBINDINGS:
+            overlay.show_keybindings()
+        elif kind == MESSAGE_METRICS:
+            overlay.show_metrics(argument)
+        elif kind == MESSAGE_CLOSE:
+            overlay.close()
+            break
+
+
+class OverlayProcess:
+    """Status overlay running in a child process, driven over a message queue."""
+
+    def __init__(self, factory=create_status_overlay, queue_size: int = 64):
+        """
+        Starts the overlay process.
+
+        Args:
+            factory: Module-level callable creating the overlay in the child process
+            queue_size: Number of pending messages before new ones are dropped
+        """
+        context = multiprocessing.get_context('spawn')
+        self.messages = context.Queue(queue_size)
+        self.dropped = 0
+        self.process = context.Process(target=_serve, args=(self.messages, factory), daemon=True)
+        self.process.start()
+
+    def _send(self, kind: str, argument=None):
+        """Queues a message without ever blocking the caller."""
+        try:
+            self.messages.put_nowait((kind, argument))
+        except Full:
+            self.dropped += 1
+
+    def update_status(self, status):
+        """Updates the status displayed by the overlay."""
+        self._send(MESSAGE_STATUS, status)
+
+    def show_keybindings(self):
+        """Displays the keyboard shortcuts."""
+        self._send(MESSAGE_KEYBINDINGS)
+
+    def show_metrics(self, text):
+        """Displays a line of performance metrics under the status."""
+        self._send(MESSAGE_METRICS, text)
+
+    def close(self):
+        """Closes the overlay and waits for its process to end."""
+        if not self.process.is_alive():
+            return
+        try:
+            self.messages.put((MESSAGE_CLOSE, None), timeout=CLOSE_TIMEOUT)
+        except Full:
+            pass
+        self.process.join(CLOSE_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
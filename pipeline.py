@@ -0,0 +1,216 @@
+"""Module running capture, detection and clicks as separate pipeline stages."""
+
+from collections import deque
+from queue import Empty, Full, Queue
+from threading import Condition, Thread
+from time import perf_counter
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from constants import (STATUS_RUN, STATUS_EXIT, GAME_UNFOCUSED, PIPELINE_RING_SIZE,
+                     PIPELINE_ACTION_QUEUE_SIZE, PIPELINE_FRAME_TIMEOUT)
+
+class StageStats:
+    """Latency counters of one pipeline stage."""
+
+    def __init__(self):
+        """Initializes the empty counters."""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, seconds: float):
+        """Adds one latency sample."""
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        """Returns the mean latency in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """Returns the counters with latencies in milliseconds."""
+        return {'count': self.count, 'mean_ms': self.mean * 1000,
+                'max_ms': self.max * 1000, 'last_ms': self.last * 1000}
+
+
+class FrameRing:
+    """Bounded ring buffer of the latest captured frames."""
+
+    def __init__(self, capacity: int = PIPELINE_RING_SIZE):
+        """Initializes the ring with room for capacity frames."""
+        self.frames = deque(maxlen=capacity)
+        self.changed = Condition()
+        self.sequence = 0
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, frame: np.ndarray, captured_at: float):
+        """Adds a frame, evicting the oldest one if the ring is full."""
+        with self.changed:
+            self.sequence += 1
+            self.frames.append((self.sequence, captured_at, frame))
+            self.changed.notify_all()
+
+    def latest(self, after: int, timeout: float) -> Optional[Tuple[int, float, np.ndarray]]:
+        """
+        Waits for a frame newer than a sequence number and returns the newest one.
+
+        Frames captured in between are skipped and counted as dropped.
+
+        Args:
+            after: Sequence number of the last frame consumed
+            timeout: Seconds to wait for a new frame
+
+        Returns:
+            (sequence, capture time, frame), or None on timeout or once closed
+        """
+        with self.changed:
+            if not self.changed.wait_for(lambda: self.closed or self.sequence > after, timeout):
+                return None
+            if self.closed:
+                return None
+            newest = self.frames[-1]
+            self.dropped += newest[0] - after - 1
+            return newest
+
+    def close(self):
+        """Wakes up the consumers so they can stop."""
+        with self.changed:
+            self.closed = True
+            self.changed.notify_all()
+
+
+class DetectionPipeline:
+    """Runs a DialogueSkipper as capture, detection and actuation stages."""
+
+    def __init__(self, skipper, ring_size: int = PIPELINE_RING_SIZE,
+                 action_queue_size: int = PIPELINE_ACTION_QUEUE_SIZE):
+        """
+        Initializes the stages around an existing skipper.
+
+        Args:
+            skipper: DialogueSkipper providing the capture, detection and input backends
+            ring_size: Number of latest frames kept between capture and detection
+            action_queue_size: Number of pending clicks before new ones are dropped
+        """
+        self.skipper = skipper
+        self.frames = FrameRing(ring_size)
+        self.actions: Queue = Queue(maxsize=action_queue_size)
+        self.dropped_clicks = 0
+        self.capture_stats = StageStats()
+        self.detect_stats = StageStats()
+        self.actuate_stats = StageStats()
+        self.reaction_stats = StageStats()  # From frame capture to click done
+
+    def run(self):
+        """Runs the stages until the skipper exits."""
+        detector = Thread(target=self._detect_loop, daemon=True)
+        actuator = Thread(target=self._actuate_loop, daemon=True)
+        detector.start()
+        actuator.start()
+        try:
+            self._capture_loop()
+        finally:
+            self.frames.close()
+            detector.join()
+            self.actions.put(None)
+            actuator.join()
+
+    def _capture_loop(self):
+        """Producer stage: grabs the probe region into the frame ring."""
+        skipper = self.skipper
+        while True:
+            skipper.wait_while_paused()
+            if skipper.status == STATUS_EXIT:
+                break
+
+            if skipper.is_genshinimpact_active():
+                start = perf_counter()
+                with skipper.metrics.timer('capture'):
+                    frame = skipper.capture.grab()
+                self.capture_stats.record(perf_counter() - start)
+                self.frames.put(frame, start)
+                interval = skipper.scheduler.interval
+            else:
+                skipper.enter_state(GAME_UNFOCUSED)
+                interval = skipper.next_interval(False)
+            skipper.metrics.publish()
+            skipper.wait_next_tick(interval)
+
+    def _detect_loop(self):
+        """Consumer stage: evaluates the newest frame and queues clicks."""
+        skipper = self.skipper
+        last = 0
+        while not self.frames.closed:
+            item = self.frames.latest(last, PIPELINE_FRAME_TIMEOUT)
+            if item is None:
+                continue
+            last, captured_at, frame = item
+            # The geometry is only rebuilt here, and frames grabbed before a resize are stale
+            skipper.follow_window()
+            if frame.shape[:2] != skipper.capture.shape:
+                continue
+
+            start = perf_counter()
+            detected = skipper.detect(frame)
+            skipper.next_interval(detected)
+            if skipper.recorder:
+                # Clicks happen on the actuator thread and are not recorded here
+                skipper.recorder.record(frame if skipper.refreshed else None,
+                                        skipper.game_state.state, detected, False,
+                                        len(skipper.option_rows))
+            self.detect_stats.record(perf_counter() - start)
+
+            if detected:
+                try:
+                    self.actions.put_nowait(captured_at)
+                except Full:
+                    self.dropped_clicks += 1
+
+    def _actuate_loop(self):
+        """Actuator stage: performs the queued clicks."""
+        while True:
+            try:
+                captured_at = self.actions.get(timeout=PIPELINE_FRAME_TIMEOUT)
+            except Empty:
+                continue
+            if captured_at is None:
+                break
+            # Do not click for frames captured before a pause
+            if self.skipper.status != STATUS_RUN:
+                continue
+
+            start = perf_counter()
+            clicked = self.skipper.actuate()
+            end = perf_counter()
+            self.actuate_stats.record(end - start)
+            if clicked:
+                self.reaction_stats.record(end - captured_at)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns the latency counters of every stage."""
+        return {
+            'capture': self.capture_stats.as_dict(),
+            'detect': self.detect_stats.as_dict(),
+            'actuate': self.actuate_stats.as_dict(),
+            'reaction': self.reaction_stats.as_dict(),
+            'dropped': {'frames': self.frames.dropped, 'clicks': self.dropped_clicks},
+        }
+
+    def summary(self) -> str:
+        """Formats the stage latencies as a single line for the console."""
+        return ("Pipeline: "
+                f"capture {self.capture_stats.mean * 1000:.1f} ms, "
+                f"detect {self.detect_stats.mean * 1000:.2f} ms, "
+                f"click {self.actuate_stats.mean * 1000:.1f} ms, "
+                f"reaction {self.reaction_stats.mean * 1000:.1f} ms mean / "
+                f"{self.reaction_stats.max * 1000:.1f} ms max, "
+                f"{self.frames.dropped} stale frames dropped, "
+                f"{self.dropped_clicks} clicks dropped")
@@ -0,0 +1,88 @@
+"""Module choosing how often the detection loop polls the screen."""
+
+from time import perf_counter, process_time
+from typing import Dict, Optional
+
+from constants import (POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_BACKOFF_FACTOR,
+                     POLL_TRANSITION_INTERVAL)
+
+class AdaptivePollScheduler:
+    """Polls fast while dialogues are detected and backs off while idle."""
+
+    def __init__(self, min_interval: float = POLL_MIN_INTERVAL,
+                 max_interval: float = POLL_MAX_INTERVAL,
+                 backoff_factor: float = POLL_BACKOFF_FACTOR,
+                 transition_interval: float = POLL_TRANSITION_INTERVAL):
+        """
+        Initializes the scheduler.
+
+        Args:
+            min_interval: Delay in seconds between ticks while a dialogue is detected
+            max_interval: Longest delay in seconds reached after consecutive idle ticks
+            backoff_factor: Growth of the delay after each idle tick
+            transition_interval: Delay in seconds while a loading screen or fade is shown
+        """
+        if min_interval < 0 or max_interval < min_interval:
+            raise ValueError("Polling intervals must satisfy 0 <= min <= max")
+        if backoff_factor < 1:
+            raise ValueError("The backoff factor must be at least 1")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.transition_interval = max(transition_interval, max_interval)
+        self.interval = min_interval
+
+        # Statistics for the CPU / latency report
+        self.ticks = 0
+        self.detections = 0
+        self.total_wait = 0.0
+        self.start_time = perf_counter()
+        self.start_cpu = process_time()
+
+    def next_interval(self, detected: bool, fixed: Optional[float] = None) -> float:
+        """
+        Records the result of a tick and returns the delay before the next one.
+
+        Args:
+            detected: True if the tick found a dialogue to skip
+            fixed: Delay imposed by the game state, None to back off while idle
+
+        Returns:
+            float: Delay in seconds to wait before the next tick
+        """
+        self.ticks += 1
+        if detected:
+            self.detections += 1
+            self.interval = self.min_interval
+        elif fixed is not None:
+            self.interval = fixed
+        else:
+            # Step back gradually; the first idle tick leaves the fast rate
+            step = max(self.interval, 0.001) * self.backoff_factor
+            self.interval = min(self.max_interval, step)
+        self.total_wait += self.interval
+        return self.interval
+
+    def report(self) -> Dict[str, float]:
+        """Returns the measured CPU usage and the reaction latency bounds."""
+        elapsed = max(perf_counter() - self.start_time, 1e-9)
+        cpu = process_time() - self.start_cpu
+        busy = max(elapsed - self.total_wait, 0.0)
+        tick_cost = busy / self.ticks if self.ticks else 0.0
+        return {
+            'ticks': self.ticks,
+            'detections': self.detections,
+            'elapsed_s': elapsed,
+            'cpu_s_per_hour': cpu / elapsed * 3600,
+            'mean_tick_cost_s': tick_cost,
+            'active_latency_s': self.min_interval + tick_cost,
+            'idle_latency_s': self.max_interval + tick_cost,
+        }
+
+    def summary(self) -> str:
+        """Formats the report as a single line for the console."""
+        r = self.report()
+        return (f"Polling: {r['ticks']} ticks, {r['detections']} detections, "
+                f"{r['cpu_s_per_hour']:.0f} CPU s/hour, "
+                f"reaction latency {r['active_latency_s'] * 1000:.0f} ms active / "
+                f"{r['idle_latency_s'] * 1000:.0f} ms idle")
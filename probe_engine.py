@@ -0,0 +1,97 @@
+"""Module evaluating every detection probe on a captured buffer at once."""
+
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from constants import (COLOR_AUTOPLAY_ICON, COLOR_WHITE,
+                     PROBE_AUTOPLAY, PROBE_OPTION,
+                     PROBE_TOLERANCE, PROBE_PATCH_RADIUS)
+
+class ProbeSpec(NamedTuple):
+    """Declarative description of one detection probe."""
+    name: str
+    role: str
+    x: int
+    y: int
+    color: Tuple[int, int, int]
+    tolerance: int = 0
+    radius: int = 0  # 0 reads a single pixel, otherwise the patch average is compared
+
+
+def default_probe_specs(screen_setup, tolerance: int = PROBE_TOLERANCE,
+                        radius: int = PROBE_PATCH_RADIUS) -> List[ProbeSpec]:
+    """Builds the probe table from the coordinates computed by ScreenSetup."""
+    s = screen_setup
+    return [
+        ProbeSpec('autoplay_icon', PROBE_AUTOPLAY, s.playing_icon_x, s.playing_icon_y,
+                  COLOR_AUTOPLAY_ICON, tolerance, radius),
+        ProbeSpec('dialogue_icon_lower', PROBE_OPTION, s.dialogue_icon_x, s.dialogue_icon_lower_y,
+                  COLOR_WHITE, tolerance, radius),
+        ProbeSpec('dialogue_icon_higher', PROBE_OPTION, s.dialogue_icon_x, s.dialogue_icon_higher_y,
+                  COLOR_WHITE, tolerance, radius),
+    ]
+
+
+def probe_bounds(specs: List[ProbeSpec]) -> Tuple[int, int, int, int]:
+    """Returns the (left, top, right, bottom) box covering every probe patch."""
+    left = min(max(0, p.x - p.radius) for p in specs)
+    top = min(max(0, p.y - p.radius) for p in specs)
+    right = max(p.x + p.radius for p in specs) + 1
+    bottom = max(p.y + p.radius for p in specs) + 1
+    return left, top, right, bottom
+
+
+class ProbeEngine:
+    """Probe table compiled into index arrays for one vectorized comparison per tick."""
+
+    def __init__(self, specs: List[ProbeSpec], origin: Tuple[int, int]):
+        """
+        Compiles the probe table.
+
+        Args:
+            specs: Probes to evaluate
+            origin: Game coordinates (left, top) of the buffer the probes are read from
+        """
+        # Group the probes by role so the results reduce with one call
+        self.specs = sorted(specs, key=lambda p: p.role)
+        self.roles = []
+        role_starts = []
+        for i, spec in enumerate(self.specs):
+            if not self.roles or self.roles[-1] != spec.role:
+                self.roles.append(spec.role)
+                role_starts.append(i)
+        self.role_starts = np.array(role_starts, dtype=np.intp)
+
+        left, top = origin
+        rows, cols, patch_starts = [], [], []
+        for spec in self.specs:
+            patch_starts.append(len(rows))
+            for y in range(max(0, spec.y - spec.radius), spec.y + spec.radius + 1):
+                for x in range(max(0, spec.x - spec.radius), spec.x + spec.radius + 1):
+                    rows.append(y - top)
+                    cols.append(x - left)
+        self.rows = np.array(rows, dtype=np.intp)
+        self.cols = np.array(cols, dtype=np.intp)
+        self.patch_starts = np.array(patch_starts, dtype=np.intp)
+        self.patch_sizes = np.diff(np.append(self.patch_starts, len(rows)))[:, None]
+        self.single_pixels = len(rows) == len(self.specs)
+        self.colors = np.array([p.color for p in self.specs], dtype=np.float32)
+        self.tolerances = np.array([p.tolerance for p in self.specs], dtype=np.float32)
+
+    def hits(self, buffer: np.ndarray) -> np.ndarray:
+        """Returns, for each probe, whether its color matches within tolerance."""
+        pixels = buffer[self.rows, self.cols].astype(np.float32)
+        if not self.single_pixels:
+            pixels = np.add.reduceat(pixels, self.patch_starts, axis=0) / self.patch_sizes
+        return np.abs(pixels - self.colors).max(axis=1) <= self.tolerances
+
+    def evaluate(self, buffer: np.ndarray) -> Dict[str, bool]:
+        """
+        Evaluates every probe on a captured buffer.
+
+        Returns:
+            Dict[str, bool]: For each role, True if at least one of its probes matched
+        """
+        by_role = np.logical_or.reduceat(self.hits(buffer), self.role_starts)
+        return dict(zip(self.roles, by_role.tolist()))
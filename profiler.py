@@ -0,0 +1,182 @@
+"""Module profiling the detection loop, live by sampling or on saved frames with cProfile."""
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from threading import Thread
+from time import sleep
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from constants import PROFILE_FILE, PROFILE_INTERVAL, PROFILE_TICKS, PROFILE_TOP, STATUS_RUN
+from dialogue_skipper import DialogueSkipper
+from frame_source import ReplayFrameSource
+from input_backend import FakeInputSink
+from screen_setup import ScreenSetup
+from session_stats import NullSessionStats
+from status_sink import ConsoleStatusSink
+from window_tracker import FrameSourceFocusProvider, WindowFocusTracker
+
+# Modules summarized after a profile: the skipper, the screen geometry and the capture backend
+PROFILE_MODULES = ('dialogue_skipper', 'screen_setup', 'screen_capture', 'frame_source')
+
+def function_name(code) -> str:
+    """Returns the module-qualified name of a function, as shown in the profiles."""
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampler of Python stacks, run from a background thread.
+
+    Stacks are counted in the collapsed format read by flamegraph.pl and
+    speedscope: one "thread;outer;...;inner count" line per distinct stack.
+    """
+
+    def __init__(self, threads: Optional[Iterable[int]] = None, interval: float = PROFILE_INTERVAL):
+        """
+        Initializes the sampler without starting it.
+
+        Args:
+            threads: Identifiers of the threads to sample, all other threads if None
+            interval: Seconds between two samples
+        """
+        self.threads = set(threads) if threads is not None else None
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.running = False
+        self.switch_interval = sys.getswitchinterval()
+        self.thread = Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Starts sampling."""
+        # The sampler needs the GIL about as often as it samples
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval))
+        self.running = True
+        self.thread.start()
+
+    def _run(self):
+        """Sampler thread: records the stack of every sampled thread each interval."""
+        own = threading.get_ident()
+        while self.running:
+            sleep(self.interval)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (self.threads is not None and ident not in self.threads):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(function_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        """Stops sampling."""
+        self.running = False
+        self.thread.join()
+        sys.setswitchinterval(self.switch_interval)
+
+    def write_collapsed(self, path: str):
+        """Writes the stacks in the collapsed format, one line per stack."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+    def hot_functions(self, modules: Tuple[str, ...] = PROFILE_MODULES,
+                      top: int = PROFILE_TOP) -> List[Tuple[str, int, int]]:
+        """
+        Returns the functions of some modules found in the most samples.
+
+        Returns:
+            List[Tuple[str, int, int]]: Name, samples where it runs its own code,
+            and samples where it is anywhere on the stack
+        """
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            functions = stack.split(';')[1:]
+            if functions:
+                own[functions[-1]] += count
+            for function in set(functions):
+                total[function] += count
+        names = [name for name in total if name.split('.', 1)[0] in modules]
+        names.sort(key=lambda name: -total[name])
+        return [(name, own[name], total[name]) for name in names[:top]]
+
+    def summary(self, top: int = PROFILE_TOP) -> str:
+        """Formats the hot functions as a table of sample percentages."""
+        samples = max(sum(self.stacks.values()), 1)
+        lines = [f"{'own %':>7} {'total %':>8}  function ({self.samples} samples)"]
+        for name, own, total in self.hot_functions(top=top):
+            lines.append(f"{own / samples * 100:>7.1f} {total / samples * 100:>8.1f}  {name}")
+        return '\n'.join(lines)
+
+
+def call_summary(stats: pstats.Stats, modules: Tuple[str, ...] = PROFILE_MODULES,
+                 top: int = PROFILE_TOP) -> str:
+    """Formats the functions of some modules with the most cumulative time as a table."""
+    rows = []
+    for (path, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        module = os.path.splitext(os.path.basename(path))[0]
+        if module in modules:
+            rows.append((cumulative, own, calls, f'{module}.{name}:{line}'))
+    rows.sort(reverse=True)
+    lines = [f"{'calls':>8} {'own ms':>9} {'total ms':>9} {'us/call':>8}  function"]
+    for cumulative, own, calls, name in rows[:top]:
+        lines.append(f"{calls:>8} {own * 1000:>9.1f} {cumulative * 1000:>9.1f} "
+                     f"{cumulative / calls * 1000000:>8.1f}  {name}")
+    return '\n'.join(lines)
+
+
+def _replay_ticks(frames: List, titles: Optional[Dict[int, str]], ticks: int):
+    """Builds a skipper on saved frames, with no real input or display, and runs some ticks."""
+    source = ReplayFrameSource(frames, titles, loop=True)
+    height, width = frames[0].shape[:2]
+    skipper = DialogueSkipper(ScreenSetup(width, height, layout_file=None), source,
+                              WindowFocusTracker(FrameSourceFocusProvider(source), ttl=0.0),
+                              FakeInputSink(), ConsoleStatusSink(),
+                              session_stats=NullSessionStats())
+    skipper.status = STATUS_RUN
+    for _ in range(ticks):
+        skipper.tick()
+
+
+def profile_frames(directory: str, ticks: int = PROFILE_TICKS, output: str = PROFILE_FILE,
+                   interval: float = PROFILE_INTERVAL):
+    """
+    Profiles a number of ticks on a directory of saved frames.
+
+    The frames are loaded first, then the ticks run twice: once under the
+    sampler, written as collapsed stacks to output, then under cProfile,
+    written to output with a .prof extension and summarized for the skipper,
+    screen geometry and capture modules.
+
+    Args:
+        directory: Directory of PNG or .npy full-screen frames, with an optional window_titles.txt
+        ticks: Number of detection ticks, the frames being replayed in a loop
+        output: Collapsed stack file
+        interval: Seconds between two samples
+    """
+    replay = ReplayFrameSource.from_directory(directory)
+    frames, titles = replay.frames, replay.titles
+
+    sampler = SamplingProfiler([threading.get_ident()], interval)
+    sampler.start()
+    _replay_ticks(frames, titles, ticks)
+    sampler.stop()
+    sampler.write_collapsed(output)
+
+    profile = cProfile.Profile()
+    profile.runcall(_replay_ticks, frames, titles, ticks)
+    stats = pstats.Stats(profile)
+    stats.dump_stats(os.path.splitext(output)[0] + '.prof')
+
+    print(f"{sampler.samples} samples of {ticks} ticks on {len(frames)} frames "
+          f"written to {output}\n")
+    print(call_summary(stats))
@@ -0,0 +1,128 @@
+"""Module grabbing the screen region used by the detection probes."""
+
+from time import perf_counter
+from typing import Dict, Tuple
+
+import numpy as np
+
+from constants import GATE_SAMPLE_STRIDE, GATE_MAX_AGE
+
+class ProbeCapture:
+    """Captures the bounding box of every detection probe in a single grab."""
+
+    def __init__(self, frame_source, bbox: Tuple[int, int, int, int],
+                 window_origin: Tuple[int, int] = (0, 0)):
+        """
+        Initializes the capture region.
+
+        Args:
+            frame_source: Backend providing the screen pixels
+            bbox: Region covering every probe as (left, top, right, bottom) in game coordinates
+            window_origin: Screen coordinates of the top-left pixel of the game
+        """
+        self.frame_source = frame_source
+        self.buffer = None
+        self.left, self.top, self.right, self.bottom = bbox
+        self.window_origin = window_origin
+
+    @property
+    def bbox(self) -> Tuple[int, int, int, int]:
+        """Returns the capture region as (left, top, right, bottom) in game coordinates."""
+        return self.left, self.top, self.right, self.bottom
+
+    @property
+    def origin(self) -> Tuple[int, int]:
+        """Returns the game coordinates of the top-left pixel of the buffer."""
+        return self.left, self.top
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Returns the (height, width) of the buffer."""
+        return self.bottom - self.top, self.right - self.left
+
+    def grab(self) -> np.ndarray:
+        """Grabs the probe region once, wherever the game window is, and keeps it for this tick."""
+        x, y = self.window_origin
+        self.buffer = self.frame_source.grab((self.left + x, self.top + y,
+                                              self.right + x, self.bottom + y))
+        return self.buffer
+
+    def pixel(self, x: int, y: int) -> Tuple[int, int, int]:
+        """Returns the color at a game coordinate from the last grab."""
+        r, g, b = self.buffer[y - self.top, x - self.left]
+        return int(r), int(g), int(b)
+
+
+class FrameChangeGate:
+    """Detects unchanged captures so the previous detection result can be reused."""
+
+    def __init__(self, shape: Tuple[int, int], rows: np.ndarray, cols: np.ndarray,
+                 stride: int = GATE_SAMPLE_STRIDE, max_age: float = GATE_MAX_AGE):
+        """
+        Initializes the sparse sample grid.
+
+        Args:
+            shape: Height and width of the captured buffer
+            rows: Buffer rows that must always be sampled (the probe pixels)
+            cols: Buffer columns matching rows
+            stride: Spacing in pixels of the sample grid over the rest of the buffer
+            max_age: Seconds after which the detection is refreshed even if unchanged
+        """
+        height, width = shape
+        grid_rows, grid_cols = np.meshgrid(np.arange(0, height, stride),
+                                           np.arange(0, width, stride), indexing='ij')
+        self.rows = np.concatenate([np.asarray(rows, dtype=np.intp), grid_rows.ravel()])
+        self.cols = np.concatenate([np.asarray(cols, dtype=np.intp), grid_cols.ravel()])
+        self.max_age = max_age
+        self.previous = None
+        self.refreshed_at = 0.0
+
+        # Counters of the work saved by the gate
+        self.ticks = 0
+        self.short_circuited = 0
+        self.refreshes_on_change = 0
+        self.refreshes_on_age = 0
+
+    def should_refresh(self, buffer: np.ndarray) -> bool:
+        """
+        Compares the sampled pixels with the previous tick.
+
+        Returns:
+            bool: True if detection must run again, False to reuse the last result
+        """
+        self.ticks += 1
+        sample = buffer[self.rows, self.cols]
+        now = perf_counter()
+        if self.previous is None or not np.array_equal(sample, self.previous):
+            self.refreshes_on_change += 1
+        elif now - self.refreshed_at >= self.max_age:
+            self.refreshes_on_age += 1
+        else:
+            self.short_circuited += 1
+            return False
+        self.previous = sample
+        self.refreshed_at = now
+        return True
+
+    def invalidate(self):
+        """Forces the next tick to run detection."""
+        self.previous = None
+
+    def report(self) -> Dict[str, int]:
+        """Returns the tick counters."""
+        return {'ticks': self.ticks, 'reused': self.short_circuited,
+                'refreshes_on_change': self.refreshes_on_change,
+                'refreshes_on_age': self.refreshes_on_age}
+
+    def summary(self) -> str:
+        """Formats the counters as a single line for the console."""
+        saved = self.short_circuited / self.ticks * 100 if self.ticks else 0.0
+        return (f"Change gate: {self.short_circuited}/{self.ticks} ticks reused "
+                f"({saved:.0f}%), {self.refreshes_on_change} refreshed on change, "
+                f"{self.refreshes_on_age} on age")
+
+
+def union_bounds(*boxes: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    """Returns the smallest (left, top, right, bottom) box containing every box."""
+    lefts, tops, rights, bottoms = zip(*boxes)
+    return min(lefts), min(tops), max(rights), max(bottoms)
@@ -1,18 +1,75 @@
 """Module managing screen configuration and dimensions."""
 
 import os
-from win32api import GetSystemMetrics # type: ignore
+from typing import Tuple
+
 from dotenv import find_dotenv, load_dotenv, set_key # type: ignore
 
+from constants import LAYOUT_FILE
+from layout_profile import LAYOUT_FIELDS, LayoutProfileCache, formula_hash
+
 class ScreenSetup:
     """Class managing screen configuration and dimensions."""
     
-    def __init__(self):
-        """Initializes screen dimensions and detection pixel coordinates."""
-        self.width = None
-        self.height = None
-        self.setup_screen_dimensions()
-        self.calculate_pixel_coordinates()
+    def __init__(self, width=None, height=None, layout_file=LAYOUT_FILE, store_layout=True):
+        """
+        Initializes screen dimensions and detection pixel coordinates.
+        
+        The coordinates are relative to the top-left pixel of the game, which is
+        the screen origin until set_window places it in a window.
+        
+        Args:
+            width: Screen width; read from .env or detected if omitted
+            height: Screen height; read from .env or detected if omitted
+            layout_file: Layout profile file, or None to always compute the coordinates
+            store_layout: False to only read the layout profiles, for a size that may not last
+        """
+        self.width = width
+        self.height = height
+        self.layout_file = layout_file
+        self.origin = (0, 0)
+        self.dpi_scale = 1.0
+        if width is None or height is None:
+            self.setup_screen_dimensions()
+        self.compute_layout(store_layout)
+    
+    def compute_layout(self, store: bool = True):
+        """
+        Sets the coordinates for the current size, from the layout profiles if enabled.
+        
+        Args:
+            store: If True, a computed layout is saved as the profile of this size
+        """
+        if self.layout_file is None:
+            self.calculate_pixel_coordinates()
+        else:
+            self.load_layout(self.layout_file, store)
+    
+    def set_window(self, rect: Tuple[int, int, int, int], dpi_scale: float = 1.0) -> bool:
+        """
+        Places the game in the client area of its window.
+        
+        Args:
+            rect: Client area as (left, top, right, bottom) in virtual screen pixels,
+                  negative on monitors left of or above the primary one
+            dpi_scale: Display scale of the monitor showing the window
+        
+        Returns:
+            bool: True if the size changed and the coordinates were recomputed
+        """
+        left, top, right, bottom = rect
+        self.origin = (left, top)
+        self.dpi_scale = dpi_scale
+        if (right - left, bottom - top) == (self.width, self.height):
+            return False
+        self.width, self.height = right - left, bottom - top
+        # Sizes passed through while a window edge is dragged are not worth a profile
+        self.compute_layout(store=False)
+        return True
+    
+    def to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        """Converts a game coordinate to a screen coordinate."""
+        return x + self.origin[0], y + self.origin[1]
     
     def setup_screen_dimensions(self):
         """Sets up screen dimensions from .env file or by detection."""
@@ -26,6 +83,7 @@ class ScreenSetup:
     
     def _detect_screen_dimensions(self):
         """Detects screen dimensions and saves them."""
+        from win32api import GetSystemMetrics # type: ignore
         self.width = GetSystemMetrics(0)
         self.height = GetSystemMetrics(1)
 
@@ -50,6 +108,37 @@ class ScreenSetup:
         set_key(dotenv_file, "WIDTH", str(self.width), quote_mode="never")
         set_key(dotenv_file, "HEIGHT", str(self.height), quote_mode="never")
     
+    def load_layout(self, layout_file: str, store: bool = True):
+        """Loads the coordinates from the layout profiles, computing them on a miss."""
+        profiles = LayoutProfileCache(layout_file, self.layout_formula_hash())
+        layout = profiles.get(self.width, self.height)
+        if layout is None:
+            self.calculate_pixel_coordinates()
+            if store:
+                profiles.store(self.width, self.height, self.layout())
+        else:
+            self.apply_layout(layout)
+        self.apply_layout(profiles.override(self.width, self.height))
+    
+    @staticmethod
+    def layout_formula_hash() -> str:
+        """Fingerprints the formulas used by calculate_pixel_coordinates."""
+        return formula_hash(ScreenSetup.calculate_pixel_coordinates,
+                            ScreenSetup.get_position_right,
+                            ScreenSetup.get_position_left,
+                            ScreenSetup.width_adjust,
+                            ScreenSetup.height_adjust)
+    
+    def layout(self) -> dict:
+        """Returns the detection and click coordinates."""
+        return {field: getattr(self, field) for field in LAYOUT_FIELDS}
+    
+    def apply_layout(self, layout: dict):
+        """Sets the known coordinates of a layout, ignoring other entries."""
+        for field in LAYOUT_FIELDS:
+            if field in layout:
+                setattr(self, field, int(layout[field]))
+    
     def width_adjust(self, x: int) -> int:
         """Adjusts an x coordinate to screen width."""
         return int(x/1920 * self.width)
@@ -109,8 +198,4 @@ class ScreenSetup:
         else:
             self.dialogue_icon_x = self.width_adjust(1301)
             self.dialogue_icon_lower_y = self.height_adjust(808)
-            self.dialogue_icon_higher_y = self.height_adjust(790)
-        
-        # Loading screen check point
-        self.loading_screen_x = self.width_adjust(1200)
-        self.loading_screen_y = self.height_adjust(700)
\ No newline at end of file
+            self.dialogue_icon_higher_y = self.height_adjust(790)
\ No newline at end of file
@@ -0,0 +1,267 @@
+"""
+Crabe Dialogue Skipper session recorder
+Records the pixels read by detection, with its decisions, to a memory-mapped ring file.
+
+Usage: python session_recorder.py session.rec
+"""
+
+import argparse
+import os
+from time import time
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from constants import GAME_STATES, RECORD_MAX_MB, RECORD_FILE_VERSION
+
+RECORD_MAGIC = b'CRABREC1'
+HEADER_SIZE = 64
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'), ('version', '<u4'), ('capacity', '<u4'),
+    ('screen_width', '<u4'), ('screen_height', '<u4'),
+    ('left', '<i4'), ('top', '<i4'), ('height', '<u4'), ('width', '<u4'),
+    ('stride', '<u2'), ('strip_left', '<u2'), ('strip_top', '<u2'),
+    ('strip_right', '<u2'), ('strip_bottom', '<u2'), ('probes', '<u2'),
+    ('next', '<u8'),
+])
+
+# One RGB pixel as a single element, so strided copies move 3 bytes per step
+PIXEL = np.dtype((np.void, 3))
+
+def record_dtype(grid: Tuple[int, int], strip: Tuple[int, int], probes: int) -> np.dtype:
+    """Returns the layout of one record holding the pixels read by each detector."""
+    return np.dtype([
+        ('sequence', '<u8'),
+        ('time', '<f8'),
+        ('frame_sequence', '<u8'),  # Record holding the pixels seen on this tick
+        ('state', 'u1'),  # Index in GAME_STATES
+        ('detected', 'u1'),
+        ('clicked', 'u1'),
+        ('has_frame', 'u1'),
+        ('options', 'u1'),
+        ('pad', 'u1', (3,)),
+        ('grid', 'u1', grid + (3,)),  # Luminance samples of the transition classifier
+        ('strip', 'u1', strip + (3,)),  # Column scanned for dialogue options
+        ('probes', 'u1', (probes, 3)),  # Probe pixels
+    ])
+
+
+def _pixels(array: np.ndarray) -> np.ndarray:
+    """Views an RGB array with one element per pixel."""
+    if array.strides[-1] != 1:
+        array = np.ascontiguousarray(array)
+    return array.view(PIXEL)[..., 0]
+
+
+class _Geometry:
+    """Where the recorded pixels lie in the captured buffer."""
+
+    def __init__(self, shape: Tuple[int, int], stride: int, strip: Tuple[int, int, int, int],
+                 probe_rows: np.ndarray, probe_cols: np.ndarray):
+        self.shape = shape
+        self.stride = stride
+        left, top, right, bottom = strip
+        self.strip = (slice(top, bottom), slice(left, right))
+        self.probe_rows = np.asarray(probe_rows, dtype=np.intp)
+        self.probe_cols = np.asarray(probe_cols, dtype=np.intp)
+        self.grid = (slice(0, shape[0], stride), slice(0, shape[1], stride))
+        self.dtype = record_dtype(((shape[0] + stride - 1) // stride,
+                                   (shape[1] + stride - 1) // stride),
+                                  (bottom - top, right - left), len(self.probe_rows))
+
+    def index_offsets(self) -> Tuple[int, int]:
+        """Returns the offsets of the probe index table and of the first record."""
+        records = HEADER_SIZE + 2 * 4 * len(self.probe_rows)
+        return HEADER_SIZE, (records + 63) // 64 * 64
+
+
+class SessionRecorder:
+    """
+    Fixed-size ring of tick records in a memory-mapped file.
+
+    Only the pixels read by the detectors are stored: the classifier grid, the
+    option column and the probe pixels, copied with strided slices. They are
+    stored only when the change gate saw a new frame; other ticks point to the
+    last record holding pixels.
+    """
+
+    def __init__(self, path: str, bbox: Tuple[int, int, int, int], screen_size: Tuple[int, int],
+                 probe_rows: np.ndarray, probe_cols: np.ndarray,
+                 strip: Tuple[int, int, int, int], stride: int, max_mb: float = RECORD_MAX_MB):
+        """
+        Creates the ring file, replacing any previous recording.
+
+        Args:
+            path: Location of the ring file
+            bbox: Captured region as (left, top, right, bottom) game coordinates
+            screen_size: Screen (width, height)
+            probe_rows: Buffer rows of the probe pixels
+            probe_cols: Buffer columns of the probe pixels
+            strip: Option column as (left, top, right, bottom) buffer coordinates
+            stride: Spacing of the transition classifier samples
+            max_mb: Size limit of the file in megabytes
+        """
+        left, top, right, bottom = bbox
+        self.geometry = g = _Geometry((bottom - top, right - left), stride, strip,
+                                      probe_rows, probe_cols)
+        index_offset, records_offset = g.index_offsets()
+        capacity = int((max_mb * 2 ** 20 - records_offset) // g.dtype.itemsize)
+        if capacity < 1:
+            raise ValueError("The recording size limit is too small for one record")
+
+        with open(path, 'wb') as f:
+            f.truncate(records_offset + capacity * g.dtype.itemsize)
+        self.header = np.memmap(path, HEADER_DTYPE, 'r+', 0, (1,))
+        self.header[0] = (RECORD_MAGIC, RECORD_FILE_VERSION, capacity,
+                          screen_size[0], screen_size[1], left, top,
+                          g.shape[0], g.shape[1], stride, *strip, len(g.probe_rows), 0)
+        if len(g.probe_rows):
+            index = np.memmap(path, '<u4', 'r+', index_offset, (2, len(g.probe_rows)))
+            index[0], index[1] = g.probe_rows, g.probe_cols
+            index.flush()
+        self.records = np.memmap(path, g.dtype, 'r+', records_offset, (capacity,))
+
+        self.capacity = capacity
+        self.next = 0
+        self.frame_sequence = 0
+        self.state_codes = {state: code for code, state in enumerate(GAME_STATES)}
+
+    def record(self, buffer: Optional[np.ndarray], state: str, detected: bool, clicked: bool,
+               options: int = 0):
+        """
+        Appends one tick, overwriting the oldest record once the ring is full.
+
+        Args:
+            buffer: Captured buffer, or None if it did not change since the last stored one
+            state: Game state after the tick
+            detected: True if a dialogue was detected
+            clicked: True if a click was sent
+            options: Number of dialogue options detected
+        """
+        sequence = self.next
+        slot = self.records[sequence % self.capacity]
+        if buffer is not None:
+            g = self.geometry
+            pixels = _pixels(buffer)
+            np.copyto(_pixels(slot['grid']), pixels[g.grid])
+            np.copyto(_pixels(slot['strip']), pixels[g.strip])
+            slot['probes'] = buffer[g.probe_rows, g.probe_cols]
+            self.frame_sequence = sequence
+        slot['sequence'] = sequence
+        slot['time'] = time()
+        slot['frame_sequence'] = self.frame_sequence
+        slot['state'] = self.state_codes[state]
+        slot['detected'] = detected
+        slot['clicked'] = clicked
+        slot['has_frame'] = buffer is not None
+        slot['options'] = min(options, 255)
+        # Published last, so a reader never sees a half-written record
+        self.next = sequence + 1
+        self.header['next'][0] = self.next
+
+    def close(self):
+        """Writes the mapped pages to disk."""
+        self.records.flush()
+        self.header.flush()
+
+
+class SessionReader:
+    """Read-only view of a recording, as NumPy arrays."""
+
+    def __init__(self, path: str):
+        """
+        Maps a recording.
+
+        Args:
+            path: Location of the ring file
+        """
+        header = np.memmap(path, HEADER_DTYPE, 'r', 0, (1,))[0]
+        if header['magic'] != RECORD_MAGIC or header['version'] != RECORD_FILE_VERSION:
+            raise ValueError(f"Not a session recording: {path}")
+        self.screen_size = (int(header['screen_width']), int(header['screen_height']))
+        self.origin = (int(header['left']), int(header['top']))
+        self.shape = (int(header['height']), int(header['width']))
+        self.capacity = int(header['capacity'])
+        self.next = int(header['next'])
+
+        probes = int(header['probes'])
+        strip = tuple(int(header[f'strip_{side}']) for side in ('left', 'top', 'right', 'bottom'))
+        index_offset = HEADER_SIZE
+        rows = cols = np.zeros(0, dtype=np.intp)
+        if probes:
+            rows, cols = np.memmap(path, '<u4', 'r', index_offset, (2, probes))
+        self.geometry = _Geometry(self.shape, int(header['stride']), strip, rows, cols)
+        _, records_offset = self.geometry.index_offsets()
+        self.records = np.memmap(path, self.geometry.dtype, 'r', records_offset, (self.capacity,))
+
+    @property
+    def bbox(self) -> Tuple[int, int, int, int]:
+        """Returns the captured region as (left, top, right, bottom) game coordinates."""
+        left, top = self.origin
+        return left, top, left + self.shape[1], top + self.shape[0]
+
+    def __len__(self) -> int:
+        return min(self.next, self.capacity)
+
+    def order(self) -> np.ndarray:
+        """Returns the ring slots from the oldest record to the newest."""
+        return np.arange(self.next - len(self), self.next) % self.capacity
+
+    def load(self) -> np.ndarray:
+        """Returns every record, oldest first, as one structured array."""
+        return self.records[self.order()]
+
+    def __iter__(self) -> Iterator[np.void]:
+        """Steps through the records, oldest first, without loading them all."""
+        for slot in self.order():
+            yield self.records[slot]
+
+    def state_name(self, code: int) -> str:
+        """Returns the game state stored as a code."""
+        return GAME_STATES[code]
+
+    def frame(self, record: np.void) -> Optional[np.ndarray]:
+        """
+        Rebuilds the buffer seen on a tick.
+
+        Only the recorded pixels are filled in, which is every pixel the
+        detectors read, so detection on the result gives the recorded answer.
+
+        Returns:
+            np.ndarray: The buffer, or None if its pixels were overwritten in the ring
+        """
+        sequence = int(record['frame_sequence'])
+        if sequence < self.next - len(self):
+            return None
+        source = self.records[sequence % self.capacity]
+        g = self.geometry
+        buffer = np.zeros(self.shape + (3,), dtype=np.uint8)
+        buffer[g.grid] = source['grid']
+        buffer[g.strip] = source['strip']
+        buffer[g.probe_rows, g.probe_cols] = source['probes']
+        return buffer
+
+
+def main():
+    """Prints a summary of a recording."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('recording', help='session recording file')
+    args = parser.parse_args()
+
+    reader = SessionReader(args.recording)
+    records = reader.load()
+    print(f"{len(records)} ticks recorded ({reader.next} in total), "
+          f"{int(records['has_frame'].sum())} with pixels, "
+          f"{os.path.getsize(args.recording) / 2 ** 20:.1f} MB file")
+    if len(records):
+        print(f"Duration: {records['time'][-1] - records['time'][0]:.1f} s, "
+              f"{int(records['detected'].sum())} detections, "
+              f"{int(records['clicked'].sum())} clicks")
+        codes, counts = np.unique(records['state'], return_counts=True)
+        for code, count in zip(codes, counts):
+            print(f"  {reader.state_name(code)}: {count} ticks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Crabe Dialogue Skipper session statistics
+Keeps dialogue, click, state and detection latency totals of every session in SQLite.
+
+Usage: python session_stats.py [--database stats.db] [--sessions 10] [--days 7]
+"""
+
+import argparse
+import sqlite3
+from collections import defaultdict
+from datetime import date, datetime
+from threading import Event, Thread
+from time import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from constants import STATS_FILE, STATS_FLUSH_INTERVAL
+from instrumentation import HISTOGRAM_BUCKETS, LatencyHistogram
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    ended REAL NOT NULL,
+    screen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS totals (
+    session INTEGER NOT NULL REFERENCES sessions(id),
+    day TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (session, day, name)
+);
+CREATE TABLE IF NOT EXISTS latency (
+    session INTEGER NOT NULL REFERENCES sessions(id),
+    day TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (session, day, bucket)
+);
+"""
+
+# Totals named after a game state hold the seconds spent in it
+DWELL_PREFIX = 'dwell_'
+
+class NullSessionStats:
+    """Statistics turned off: every call is a no-op."""
+
+    enabled = False
+
+    def detection(self, detected: bool, seconds: float):
+        """Ignores the detection."""
+
+    def count(self, name: str, n: int = 1):
+        """Ignores the counter."""
+
+    def close(self):
+        """Nothing to write."""
+
+
+class SessionStats(NullSessionStats):
+    """
+    Totals of one session, written to SQLite in batches.
+
+    The detection loop only increments in-memory counters that never reset.
+    A writer thread owning the database periodically stores what was added
+    since its last write, in one transaction.
+    """
+
+    enabled = True
+
+    def __init__(self, path: str = STATS_FILE, interval: float = STATS_FLUSH_INTERVAL,
+                 dwell: Optional[Callable[[], Dict[str, float]]] = None, screen: str = ''):
+        """
+        Starts the writer thread.
+
+        Args:
+            path: Location of the SQLite database
+            interval: Seconds between two writes
+            dwell: Returns the seconds spent so far in each game state
+            screen: Resolution of the session, for the report
+        """
+        self.path = path
+        self.interval = interval
+        self.dwell = dwell
+        self.screen = screen
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.latency = LatencyHistogram()
+        self.last_detected = False
+        self.started = time()
+        self.flushed: Dict[str, float] = {}
+        self.flushed_buckets = [0] * HISTOGRAM_BUCKETS
+        self.session: Optional[int] = None
+        self.stopping = Event()
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def detection(self, detected, seconds):
+        """Counts one detection pass, and a new dialogue when one appears."""
+        self.latency.record(seconds)
+        if detected:
+            self.counters['detections'] += 1
+            if not self.last_detected:
+                self.counters['dialogues'] += 1
+        self.last_detected = detected
+
+    def count(self, name, n=1):
+        """Increments a counter."""
+        self.counters[name] += n
+
+    def totals(self) -> Dict[str, float]:
+        """Returns the session totals, with the dwell time of each state."""
+        # Copies are atomic, while the detection loop keeps counting
+        totals = dict(self.counters)
+        totals['detect_s'] = self.latency.total
+        if self.dwell:
+            for state, seconds in self.dwell().items():
+                totals[DWELL_PREFIX + state] = seconds
+        return totals
+
+    def _run(self):
+        """Writer thread: stores the new totals every interval and once more when closing."""
+        try:
+            connection = sqlite3.connect(self.path)
+            with connection:
+                connection.executescript(SCHEMA)
+                self.session = connection.execute(
+                    'INSERT INTO sessions (started, ended, screen) VALUES (?, ?, ?)',
+                    (self.started, self.started, self.screen)).lastrowid
+        except sqlite3.Error as e:
+            print(f"Session statistics disabled: {e}")
+            return
+        while not self.stopping.wait(self.interval):
+            self._flush(connection)
+        self._flush(connection)
+        connection.close()
+
+    def _flush(self, connection: sqlite3.Connection):
+        """Adds what was counted since the last write to today's totals of the session."""
+        totals = self.totals()
+        buckets = list(self.latency.buckets)
+        day = date.today().isoformat()
+        changes = [(self.session, day, name, value - self.flushed.get(name, 0))
+                   for name, value in totals.items() if value != self.flushed.get(name, 0)]
+        counts = [(self.session, day, bucket, count - flushed) for bucket, (count, flushed)
+                  in enumerate(zip(buckets, self.flushed_buckets)) if count != flushed]
+        try:
+            with connection:
+                connection.executemany(
+                    'INSERT INTO totals VALUES (?, ?, ?, ?) ON CONFLICT (session, day, name) '
+                    'DO UPDATE SET value = value + excluded.value', changes)
+                connection.executemany(
+                    'INSERT INTO latency VALUES (?, ?, ?, ?) ON CONFLICT (session, day, bucket) '
+                    'DO UPDATE SET count = count + excluded.count', counts)
+                connection.execute('UPDATE sessions SET ended = ? WHERE id = ?',
+                                   (time(), self.session))
+        except sqlite3.Error as e:
+            # Kept in memory and retried on the next write
+            print(f"Error writing session statistics: {e}")
+            return
+        self.flushed = totals
+        self.flushed_buckets = buckets
+
+    def close(self):
+        """Writes the last totals and stops the writer thread."""
+        self.stopping.set()
+        self.thread.join()
+
+
+def merged_histogram(counts: Iterable) -> LatencyHistogram:
+    """Rebuilds a latency histogram from (bucket, count) rows."""
+    histogram = LatencyHistogram()
+    for bucket, count in counts:
+        histogram.buckets[bucket] += count
+        histogram.count += count
+        # Durations are only known up to their bucket
+        histogram.max = max(histogram.max, (1 << bucket) / 1000000)
+    return histogram
+
+
+def rollup(connection: sqlite3.Connection, key: str, limit: int) -> List[Dict]:
+    """
+    Sums the totals per session or per day.
+
+    Args:
+        connection: Open statistics database
+        key: 'session' or 'day'
+        limit: Number of most recent sessions or days
+
+    Returns:
+        List[Dict]: Oldest first, the totals with the latency percentiles of each group
+    """
+    keys = [row[0] for row in connection.execute(
+        f'SELECT DISTINCT {key} FROM totals ORDER BY {key} DESC LIMIT ?', (limit,))]
+    rows = []
+    for value in reversed(keys):
+        totals = dict(connection.execute(
+            f'SELECT name, SUM(value) FROM totals WHERE {key} = ? GROUP BY name', (value,)))
+        histogram = merged_histogram(connection.execute(
+            f'SELECT bucket, SUM(count) FROM latency WHERE {key} = ? GROUP BY bucket', (value,)))
+        histogram.total = totals.get('detect_s', 0.0)
+        totals.update(key=value, latency=histogram.as_dict())
+        if key == 'session':
+            totals['started'], totals['ended'], totals['screen'] = connection.execute(
+                'SELECT started, ended, screen FROM sessions WHERE id = ?', (value,)).fetchone()
+        rows.append(totals)
+    return rows
+
+
+def format_rollup(totals: Dict) -> str:
+    """Formats the totals of a session or a day as a single line."""
+    latency = totals['latency']
+    dwell = sorted(((name[len(DWELL_PREFIX):], seconds) for name, seconds in totals.items()
+                    if name.startswith(DWELL_PREFIX)), key=lambda item: -item[1])
+    return (f"{int(totals.get('dialogues', 0))} dialogues, {int(totals.get('clicks', 0))} clicks, "
+            f"detect mean {latency['mean_ms']:.2f} ms p95 {latency['p95_ms']:.2f} ms; "
+            + ', '.join(f'{state} {seconds / 60:.1f} min' for state, seconds in dwell))
+
+
+def main():
+    """Prints the per-session and per-day totals."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--database', default=STATS_FILE, help='statistics database')
+    parser.add_argument('--sessions', type=int, default=10, help='number of latest sessions')
+    parser.add_argument('--days', type=int, default=7, help='number of latest days')
+    args = parser.parse_args()
+
+    connection = sqlite3.connect(f'file:{args.database}?mode=ro', uri=True)
+    print('Sessions')
+    for totals in rollup(connection, 'session', args.sessions):
+        started = datetime.fromtimestamp(totals['started'])
+        print(f"  #{totals['key']} {started:%Y-%m-%d %H:%M} "
+              f"{(totals['ended'] - totals['started']) / 60:.1f} min {totals['screen']}: "
+              f"{format_rollup(totals)}")
+    print('Days')
+    for totals in rollup(connection, 'day', args.days):
+        print(f"  {totals['key']}: {format_rollup(totals)}")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Module sharing one capture of the screen between detection processes."""
+
+from threading import Thread
+from time import monotonic
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from constants import SHARED_CAPTURE_MAX_AGE, SHARED_CAPTURE_TIMEOUT
+from frame_source import FrameSource
+
+class SharedFrames(NamedTuple):
+    """Shared memory objects of a capture, passed to the worker processes when they start."""
+    region: Tuple[int, int, int, int]  # (left, top, right, bottom) in screen coordinates
+    pixels: object  # RawArray of two frame slots
+    sequence: object  # RawValue counting the published frames
+    requested: object  # RawValue set when a worker waits for a new frame
+    grabbed_at: object  # RawValue holding the monotonic time the published frame was grabbed at
+    condition: object  # Condition guarding the values and the published slot
+
+
+def frame_slots(shared: SharedFrames) -> np.ndarray:
+    """Returns the two frame slots as an array of shape (2, height, width, 3)."""
+    left, top, right, bottom = shared.region
+    return np.frombuffer(shared.pixels, dtype=np.uint8).reshape(2, bottom - top, right - left, 3)
+
+
+class SharedDesktopCapture:
+    """
+    Grabs one screen region on demand for every worker process.
+
+    Frames alternate between two slots: the next frame is written to the slot
+    not published, then published. Workers copy their part of the published
+    slot while holding the lock, so it cannot be overwritten during the copy.
+    Workers asking for a frame while one is being grabbed share that grab, and
+    a frame younger than SHARED_CAPTURE_MAX_AGE is reused without a grab.
+    """
+
+    def __init__(self, source: FrameSource, region: Tuple[int, int, int, int], context):
+        """
+        Allocates the shared frame slots.
+
+        Args:
+            source: Backend reading the screen
+            region: Screen region covering every worker as (left, top, right, bottom)
+            context: Multiprocessing context of the worker processes
+        """
+        left, top, right, bottom = region
+        self.source = source
+        self.shared = SharedFrames(region,
+                                   context.RawArray('B', 2 * (bottom - top) * (right - left) * 3),
+                                   context.RawValue('Q', 0), context.RawValue('b', 0),
+                                   context.RawValue('d', float('-inf')), context.Condition())
+        self.frames = frame_slots(self.shared)
+        self.grabs = 0
+        self.running = False
+        self.thread = Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Starts serving the frame requests."""
+        self.running = True
+        self.thread.start()
+
+    def _run(self):
+        """Capture thread: grabs a frame whenever a worker asks for one."""
+        shared = self.shared
+        while True:
+            with shared.condition:
+                shared.condition.wait_for(lambda: shared.requested.value or not self.running)
+                if not self.running:
+                    break
+                shared.requested.value = 0
+                slot = (shared.sequence.value + 1) % 2
+            grabbed_at = monotonic()
+            np.copyto(self.frames[slot], self.source.grab(shared.region))
+            self.grabs += 1
+            with shared.condition:
+                shared.sequence.value += 1
+                shared.grabbed_at.value = grabbed_at
+                shared.condition.notify_all()
+
+    def close(self):
+        """Stops the capture thread."""
+        with self.shared.condition:
+            self.running = False
+            self.shared.condition.notify_all()
+        self.thread.join()
+
+
+class SharedFrameSource(FrameSource):
+    """Worker backend reading its regions from the shared capture."""
+
+    def __init__(self, shared: SharedFrames, max_age: float = SHARED_CAPTURE_MAX_AGE,
+                 fallback: Optional[FrameSource] = None):
+        """
+        Maps the shared frame slots.
+
+        Args:
+            shared: Shared memory objects of the capture
+            max_age: Seconds under which the published frame is reused
+            fallback: Backend reading the regions outside the shared capture,
+                      once the window has moved
+        """
+        self.shared = shared
+        self.max_age = max_age
+        self.fallback = fallback
+        self.reused = 0
+        self.frames = frame_slots(shared)
+        self.left, self.top, self.right, self.bottom = shared.region
+
+    def grab(self, bbox):
+        """Copies the region from a recent enough frame, asking for a new one if needed."""
+        shared = self.shared
+        left, top, right, bottom = bbox
+        if left < self.left or top < self.top or right > self.right or bottom > self.bottom:
+            if self.fallback is None:
+                raise ValueError(f"Region {bbox} is outside the shared capture {shared.region}")
+            return self.fallback.grab(bbox)
+        with shared.condition:
+            if monotonic() - shared.grabbed_at.value <= self.max_age:
+                self.reused += 1
+            else:
+                target = shared.sequence.value + 1
+                shared.requested.value = 1
+                shared.condition.notify_all()
+                # On timeout the last published frame is used
+                shared.condition.wait_for(lambda: shared.sequence.value >= target,
+                                          SHARED_CAPTURE_TIMEOUT)
+            frame = self.frames[shared.sequence.value % 2]
+            return frame[top - self.top:bottom - self.top, left - self.left:right - self.left].copy()
+
+    def active_window_title(self):
+        """Window titles come from the focus provider of each worker."""
+        return ""
@@ -4,9 +4,11 @@ import os
 import tkinter as tk
 import tkinter.font as tkFont
 from threading import Thread
-from time import sleep
-from ctypes import windll, byref, create_unicode_buffer
-from constants import STATUS_RUN, STATUS_PAUSE, STATUS_EXIT, KEY_START, KEY_PAUSE, KEY_EXIT
+from time import perf_counter, sleep
+from ctypes import byref, create_unicode_buffer
+from constants import (STATUS_RUN, STATUS_PAUSE, STATUS_EXIT, KEY_START, KEY_PAUSE, KEY_EXIT,
+                       FONT_CACHE_FILE)
+from font_cache import FontFamilyCache, font_file_hash
 
 # Constants for Windows API
 FR_PRIVATE = 0x10
@@ -25,6 +27,8 @@ def load_windows_font(font_path, private=True, enumerable=False):
         bool: True if the font was successfully loaded
     """
     try:
+        from ctypes import windll
+        
         # Adapt code for Python 3
         path_buffer = create_unicode_buffer(font_path)
         add_font_resource_ex = windll.gdi32.AddFontResourceExW
@@ -74,6 +78,22 @@ def get_font_family_name(before_families=None):
     
     return None
 
+def font_family_available(root, family):
+    """
+    Checks that a font family is installed without listing every family.
+    
+    Args:
+        root: Tk root used to resolve the font
+        family: Font family name
+        
+    Returns:
+        bool: True if Tk resolves the family to itself rather than to a fallback
+    """
+    try:
+        return tkFont.Font(root=root, family=family).actual('family') == family
+    except tk.TclError:
+        return False
+
 
 class StatusOverlay:
     """Floating window displaying the current status of the program."""
@@ -83,6 +103,7 @@ class StatusOverlay:
         self.root = None
         self.status_label = None
         self.title_label = None  # New label for the title
+        self.metrics_label = None  # Optional performance metrics line
         self.overlay_visible = False
         self.current_status = STATUS_PAUSE
         
@@ -102,23 +123,35 @@ class StatusOverlay:
         """Creates the floating window."""
         temp_root = tk.Tk()
         temp_root.withdraw()
-        before_families = list(tkFont.families())
         
         font_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 
                                                 'assets', 'fonts', 'HYWenHei-85W.ttf'))
         if os.path.exists(font_path):
+            start = perf_counter()
+            
+            # The family found on a previous start is reused while the font file is unchanged
+            cache = FontFamilyCache(os.getenv('FONT_CACHE_FILE', FONT_CACHE_FILE))
+            font_hash = font_file_hash(font_path)
+            cached_family = cache.get(font_hash)
+            before_families = None if cached_family else list(tkFont.families())
+            
             print(f"Attempting to load font: {font_path}")
             self.font_loaded = load_windows_font(font_path)
             
             if self.font_loaded:
-                sleep(0.5)                
-                detected_family = get_font_family_name(before_families)
-                if detected_family:
-                    self.font_family = detected_family
-                
-                print(f"Font family identified: {self.font_family}")
+                if cached_family and font_family_available(temp_root, cached_family):
+                    self.font_family = cached_family
+                    source = "cached"
+                else:
+                    sleep(0.5)                
+                    detected_family = get_font_family_name(before_families)
+                    if detected_family:
+                        self.font_family = detected_family
+                        cache.store(font_hash, detected_family)
+                    source = "font list scan"
                 
-                all_families = list(tkFont.families())
+                print(f"Font family identified: {self.font_family} "
+                      f"({source}, {(perf_counter() - start) * 1000:.0f} ms)")
         else:
             print(f"ERROR: Font file not found: {font_path}")
             
@@ -378,6 +411,32 @@ class StatusOverlay:
             # The window may have been closed
             pass
     
+    def show_metrics(self, text):
+        """Displays a line of performance metrics under the status."""
+        if not self.overlay_visible or not self.root:
+            return
+        self.root.after(0, lambda: self._update_metrics_safely(text))
+    
+    def _update_metrics_safely(self, text):
+        """Creates or updates the metrics label in a thread-safe way."""
+        try:
+            if self.metrics_label is None:
+                self.metrics_label = tk.Label(
+                    self.root,
+                    text=text,
+                    fg="#CCCCCC",
+                    bg="black",
+                    font=("Arial", 8)
+                )
+                self.metrics_label.pack(fill="x")
+                # Make room for the extra line
+                self.root.geometry(f"{self.root.winfo_width()}x45")
+            else:
+                self.metrics_label.config(text=text)
+        except tk.TclError:
+            # The window may have been closed
+            pass
+    
     def show_keybindings(self):
         """Displays keyboard shortcuts in the center of the screen for 3 seconds."""
         # Cancel any previous display
@@ -0,0 +1,113 @@
+"""Module reporting the program status without a graphical overlay."""
+
+import os
+from datetime import datetime
+
+from constants import (STATUS_RUN, STATUS_PAUSE, STATUS_EXIT,
+                     STATUS_SINK_CONSOLE, STATUS_SINK_LOG, STATUS_SINK_FILE,
+                     STATUS_LOG_FILE, STATUS_FILE)
+
+# Text shown for each status, as on the overlay
+STATUS_LABELS = {STATUS_RUN: 'ACTIVE', STATUS_PAUSE: 'PAUSED', STATUS_EXIT: 'CLOSING...'}
+
+KEYBINDINGS_TEXT = "F8 - Start, F9 - Pause, F12 - Exit, ² - Show this help"
+
+class StatusSink:
+    """Base class for the headless status displays, with the StatusOverlay methods."""
+
+    def write(self, line: str):
+        """Outputs one line of status."""
+        raise NotImplementedError
+
+    def update_status(self, status):
+        """Reports a status change."""
+        self.write(f"Status: {STATUS_LABELS.get(status, 'UNKNOWN STATUS')}")
+
+    def show_keybindings(self):
+        """Reports the keyboard shortcuts."""
+        self.write(KEYBINDINGS_TEXT)
+
+    def show_metrics(self, text):
+        """Reports a line of performance metrics."""
+        self.write(text)
+
+    def close(self):
+        """Releases the output."""
+
+
+class NullStatusSink(StatusSink):
+    """Discards the status, for workers whose status is shown by their supervisor."""
+
+    def write(self, line):
+        """Ignores the line."""
+
+
+class ConsoleStatusSink(StatusSink):
+    """Prints the status to the console."""
+
+    def write(self, line):
+        """Prints the line."""
+        print(line)
+
+
+class LogStatusSink(StatusSink):
+    """Appends timestamped status lines to a log file."""
+
+    def __init__(self, path: str = STATUS_LOG_FILE):
+        """Opens the log file in append mode."""
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, line):
+        """Appends the line with its time."""
+        if self.file.closed:
+            return
+        self.file.write(f"{datetime.now().isoformat(timespec='seconds')} {line}\n")
+        self.file.flush()
+
+    def close(self):
+        """Closes the log file."""
+        self.file.close()
+
+
+class FileStatusSink(StatusSink):
+    """Keeps a file holding only the current status, for scripts and other tools."""
+
+    def __init__(self, path: str = STATUS_FILE):
+        """Remembers the location of the status file."""
+        self.path = path
+
+    def write(self, line):
+        """Replaces the file content with the line."""
+        temporary = f'{self.path}.tmp'
+        try:
+            with open(temporary, 'w', encoding='utf-8') as f:
+                f.write(line + '\n')
+            # Readers never see a partly written file
+            os.replace(temporary, self.path)
+        except OSError as e:
+            print(f"Error writing the status file: {e}")
+
+    def show_keybindings(self):
+        """The status file only holds the status."""
+
+    def show_metrics(self, text):
+        """The status file only holds the status."""
+
+
+def create_status_sink(kind: str = STATUS_SINK_CONSOLE) -> StatusSink:
+    """
+    Creates a headless status sink.
+
+    Args:
+        kind: STATUS_SINK_CONSOLE, STATUS_SINK_LOG or STATUS_SINK_FILE
+
+    Returns:
+        StatusSink: The sink writing to the default location of its kind
+    """
+    if kind == STATUS_SINK_CONSOLE:
+        return ConsoleStatusSink()
+    if kind == STATUS_SINK_LOG:
+        return LogStatusSink(os.getenv('STATUS_LOG_FILE', STATUS_LOG_FILE))
+    if kind == STATUS_SINK_FILE:
+        return FileStatusSink(os.getenv('STATUS_FILE', STATUS_FILE))
+    raise ValueError(f"Unknown status sink: {kind}")
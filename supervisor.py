@@ -0,0 +1,254 @@
+"""Module running one detection process per game window, all fed by one screen capture."""
+
+import contextlib
+import functools
+import io
+import multiprocessing
+import os
+import sys
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from threading import Thread
+from typing import Dict, List, Optional, Tuple
+
+from constants import (STATUS_RUN, STATUS_PAUSE, STATUS_EXIT, KEY_START, KEY_PAUSE, KEY_EXIT,
+                       LAYOUT_FILE, METRICS_FILE, RECORD_FILE)
+from dialogue_skipper import DialogueSkipper
+from frame_source import GAME_WINDOW_TITLE, FrameSource
+from input_backend import FakeInputSink, InputSink
+from option_detector import OptionDetector
+from probe_engine import default_probe_specs, probe_bounds
+from screen_capture import union_bounds
+from screen_setup import ScreenSetup
+from shared_capture import SharedDesktopCapture, SharedFrames, SharedFrameSource
+from status_sink import NullStatusSink
+from window_tracker import (FakeFocusProvider, FocusProvider, GameWindow, WindowFocusTracker,
+                            enable_dpi_awareness)
+
+# Position of each status in the value shared with the workers
+STATUS_CODES = (STATUS_PAUSE, STATUS_RUN, STATUS_EXIT)
+
+# Window shown in the foreground by the fake backends: one at a time, as on a real desktop
+FAKE_FOREGROUND_HWND = 1
+
+# Start of the worker output lines passed on to the supervisor, the rest being
+# the banner, status and summary that the supervisor prints for every window
+WORKER_MESSAGES = ('Error', 'Session statistics disabled', 'Recording stopped')
+
+def create_live_backends(window: GameWindow) -> Tuple[FocusProvider, InputSink,
+                                                      Optional[FrameSource]]:
+    """
+    Creates the backends of a window in its worker process.
+
+    Returns:
+        Tuple: The Windows focus provider, the real mouse, and the screen read
+        directly once the window leaves the shared capture
+    """
+    from frame_source import LiveFrameSource
+    from input_backend import LiveInputSink
+    from window_tracker import Win32FocusProvider
+    return Win32FocusProvider(), LiveInputSink(), LiveFrameSource()
+
+
+def create_fake_backends(window: GameWindow) -> Tuple[FocusProvider, InputSink,
+                                                      Optional[FrameSource]]:
+    """Creates a fake focus provider with FAKE_FOREGROUND_HWND in the foreground, and a fake mouse."""
+    provider = FakeFocusProvider(window.title, FAKE_FOREGROUND_HWND)
+    provider.add_window(window.hwnd, window.title, window.rect)
+    return provider, FakeInputSink(), None
+
+
+def worker_file(path: str, hwnd: int) -> str:
+    """Returns the name of a file written by one window worker, suffixed with its window handle."""
+    base, extension = os.path.splitext(path)
+    return f'{base}-{hwnd}{extension}'
+
+
+def window_region(screen: ScreenSetup) -> Tuple[int, int, int, int]:
+    """Returns the screen region read by the detection of a window placed in a ScreenSetup."""
+    left, top, right, bottom = union_bounds(probe_bounds(default_probe_specs(screen)),
+                                            OptionDetector(screen).bounds)
+    x, y = screen.origin
+    return left + x, top + y, right + x, bottom + y
+
+
+# Shared objects of the worker process, set when the pool starts it
+_shared: Optional[SharedFrames] = None
+_status = None
+_status_changed = None
+
+def _init_worker(shared: SharedFrames, status, status_changed):
+    """Pool initializer: keeps the shared capture and status of the supervisor."""
+    global _shared, _status, _status_changed
+    enable_dpi_awareness()
+    _shared, _status, _status_changed = shared, status, status_changed
+
+
+def _follow_status(skipper: DialogueSkipper):
+    """Applies the status changes of the supervisor to the skipper of this worker."""
+    code = -1
+    while True:
+        with _status_changed:
+            _status_changed.wait_for(lambda: _status.value != code)
+            code = _status.value
+        status = STATUS_CODES[code]
+        if status == STATUS_EXIT:
+            skipper.shutdown()
+            break
+        skipper.set_status(status)
+
+
+class _WorkerOutput(io.TextIOBase):
+    """Standard output of a worker: passes the error lines on to stderr, drops the rest."""
+
+    def __init__(self, hwnd: int):
+        """
+        Starts with no pending line.
+
+        Args:
+            hwnd: Handle of the window of the worker, prefixed to its messages
+        """
+        self.prefix = f"Window {hwnd}: "
+        self.pending = ''
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        """Forwards the complete lines starting with one of WORKER_MESSAGES."""
+        *lines, self.pending = (self.pending + text).split('\n')
+        for line in lines:
+            if line.startswith(WORKER_MESSAGES):
+                print(self.prefix + line, file=sys.stderr, flush=True)
+        return len(text)
+
+
+def _run_worker(window: GameWindow, screen: ScreenSetup, backends) -> Dict:
+    """
+    Worker process: skips the dialogues of one window until the supervisor exits.
+
+    Exceptions reach the supervisor through the returned future.
+
+    Returns:
+        Dict: The window, the skipper statistics and the cursor moves of a fake mouse
+    """
+    # The supervisor prints the status and the summary of every window
+    with contextlib.redirect_stdout(_WorkerOutput(window.hwnd)):
+        provider, sink, fallback = backends(window)
+        # Recordings and metrics snapshots are rewritten whole, so each worker needs its own;
+        # the statistics database takes every session, from every worker, as separate rows
+        for name, default in (('RECORD_FILE', RECORD_FILE), ('METRICS_FILE', METRICS_FILE)):
+            os.environ[name] = worker_file(os.getenv(name, default), window.hwnd)
+        skipper = DialogueSkipper(screen, SharedFrameSource(_shared, fallback=fallback),
+                                  WindowFocusTracker(provider, window.title, hwnd=window.hwnd),
+                                  sink, NullStatusSink())
+        Thread(target=_follow_status, args=(skipper,), daemon=True).start()
+        skipper.run()
+    return {
+        'window': window,
+        'stats': skipper.stats(),
+        'moves': [position for _, position in getattr(sink, 'moves', [])],
+    }
+
+
+def _report_failure(window: GameWindow, worker: Future):
+    """Done callback: prints the error of a worker as soon as it stops on one."""
+    error = worker.exception()
+    if error is not None:
+        print(f"Window {window.hwnd} failed: {error}\n"
+              + ''.join(traceback.format_exception(type(error), error, error.__traceback__)))
+
+
+class Supervisor:
+    """
+    Runs one DialogueSkipper per game window, each in a process of a pool.
+
+    Every worker has its own screen geometry, state machine, click rate limit
+    and statistics. Clicks go through the one system cursor to the foreground
+    window, so only the worker of the foreground window skips dialogues; the
+    others wait in the unfocused state until their window is brought forward.
+    The supervisor grabs the screen region covering all the windows once for
+    all the workers that ask for a frame at the same time.
+    """
+
+    def __init__(self, provider: FocusProvider, frame_source: Optional[FrameSource] = None,
+                 backends=create_live_backends, title: str = GAME_WINDOW_TITLE,
+                 layout_file: Optional[str] = LAYOUT_FILE):
+        """
+        Finds the game windows and prepares their geometry.
+
+        Args:
+            provider: Backend listing the windows, in the supervisor process
+            frame_source: Backend reading the screen, the live screen if omitted
+            backends: Module-level callable creating the focus provider, the
+                      mouse and the fallback screen source of a window in its worker process
+            title: Title of the game windows
+            layout_file: Layout profile file, or None to always compute the coordinates
+        """
+        self.windows = provider.find_windows(title)
+        if not self.windows:
+            raise ValueError(f"No window titled {title}")
+        self.screens = []
+        for window in self.windows:
+            left, top, right, bottom = window.rect
+            screen = ScreenSetup(right - left, bottom - top, layout_file, store_layout=False)
+            screen.set_window(window.rect, provider.dpi_scale(window.hwnd))
+            self.screens.append(screen)
+        if frame_source is None:
+            from frame_source import LiveFrameSource
+            frame_source = LiveFrameSource()
+        self.backends = backends
+        self.context = multiprocessing.get_context('spawn')
+        self.capture = SharedDesktopCapture(
+            frame_source,
+            union_bounds(*(window_region(screen) for screen in self.screens)),
+            self.context)
+        self.status = self.context.RawValue('b', STATUS_CODES.index(STATUS_PAUSE))
+        self.status_changed = self.context.Condition()
+
+    def set_status(self, status: str):
+        """Changes the status of every worker."""
+        with self.status_changed:
+            self.status.value = STATUS_CODES.index(status)
+            self.status_changed.notify_all()
+        print(f"{status.upper()}: {len(self.windows)} windows")
+
+    def on_press(self, key) -> None:
+        """Handles the keyboard shortcuts for every window at once."""
+        key_pressed = str(key)
+        if key_pressed == KEY_START:
+            self.set_status(STATUS_RUN)
+        elif key_pressed == KEY_PAUSE:
+            self.set_status(STATUS_PAUSE)
+        elif key_pressed == KEY_EXIT:
+            self.set_status(STATUS_EXIT)
+
+    def run(self) -> List[Dict]:
+        """
+        Runs the workers until the status is set to exit.
+
+        Returns:
+            List[Dict]: What each worker that did not fail returned, in window order
+        """
+        self.capture.start()
+        try:
+            with ProcessPoolExecutor(len(self.windows), self.context, _init_worker,
+                                     (self.capture.shared, self.status,
+                                      self.status_changed)) as pool:
+                workers = [pool.submit(_run_worker, window, screen, self.backends)
+                           for window, screen in zip(self.windows, self.screens)]
+                for window, worker in zip(self.windows, workers):
+                    worker.add_done_callback(functools.partial(_report_failure, window))
+                return [worker.result() for worker in workers if worker.exception() is None]
+        finally:
+            self.capture.close()
+
+    def summary(self, results: List[Dict]) -> str:
+        """Formats the capture sharing and the clicks of each window."""
+        lines = [f"Shared capture: {self.capture.grabs} grabs of {self.capture.shared.region}"]
+        for result in results:
+            window, stats = result['window'], result['stats']
+            lines.append(f"Window {window.hwnd} at {window.rect}: "
+                         f"{stats['clicks']['dispatched']} clicks, "
+                         f"{stats['polling']['ticks']} ticks")
+        return '\n'.join(lines)
@@ -0,0 +1,50 @@
+"""Module telling loading screens and fades apart from gameplay."""
+
+from typing import Tuple
+
+import numpy as np
+
+from constants import (SCREEN_GAMEPLAY, SCREEN_LOADING, SCREEN_BLACK_FADE,
+                     TRANSITION_STRIDE, LOADING_MIN_LUMA, LOADING_MAX_SPREAD,
+                     FADE_MAX_LUMA, FADE_MAX_SPREAD)
+
+class TransitionClassifier:
+    """Classifies a captured buffer from a strided luminance summary."""
+
+    def __init__(self, stride: int = TRANSITION_STRIDE):
+        """
+        Initializes the classifier.
+
+        Args:
+            stride: Spacing in pixels of the luminance samples
+        """
+        self.stride = stride
+        self.state = SCREEN_GAMEPLAY
+        self.mean = 0.0
+        self.spread = 0.0
+
+    def summarize(self, buffer: np.ndarray) -> Tuple[float, float]:
+        """Returns the mean and standard deviation of the sampled luminance."""
+        sample = buffer[::self.stride, ::self.stride].astype(np.float32)
+        # ITU-R BT.601 luma
+        luma = sample[..., 0] * 0.299 + sample[..., 1] * 0.587 + sample[..., 2] * 0.114
+        return float(luma.mean()), float(luma.std())
+
+    def classify(self, buffer: np.ndarray) -> str:
+        """
+        Classifies a captured buffer.
+
+        A loading screen is bright and nearly uniform; a bright cutscene is
+        bright too but has much more contrast. A fade is dark and uniform.
+
+        Returns:
+            str: SCREEN_LOADING, SCREEN_BLACK_FADE or SCREEN_GAMEPLAY
+        """
+        self.mean, self.spread = self.summarize(buffer)
+        if self.mean >= LOADING_MIN_LUMA and self.spread <= LOADING_MAX_SPREAD:
+            self.state = SCREEN_LOADING
+        elif self.mean <= FADE_MAX_LUMA and self.spread <= FADE_MAX_SPREAD:
+            self.state = SCREEN_BLACK_FADE
+        else:
+            self.state = SCREEN_GAMEPLAY
+        return self.state
@@ -0,0 +1,353 @@
+"""Module tracking whether the game window has the keyboard focus."""
+
+import ctypes
+from threading import Event, Lock, Thread
+from time import perf_counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from constants import FOCUS_POLL_TTL, FOCUS_EVENT_TTL
+from frame_source import GAME_WINDOW_TITLE
+
+# Constants for Windows API
+EVENT_SYSTEM_FOREGROUND = 0x0003
+WINEVENT_OUTOFCONTEXT = 0x0000
+WM_QUIT = 0x0012
+PROCESS_PER_MONITOR_DPI_AWARE = 2
+USER_DEFAULT_SCREEN_DPI = 96
+
+FocusCallback = Callable[[int, str], None]
+
+class GameWindow(NamedTuple):
+    """One game window and the screen area of its client region."""
+    hwnd: int
+    title: str
+    rect: Tuple[int, int, int, int]  # (left, top, right, bottom) in screen coordinates
+
+
+def enable_dpi_awareness() -> bool:
+    """
+    Makes window rectangles, screen grabs and cursor positions use physical pixels on every monitor.
+
+    Must run before any window or screen query, as the awareness of a process
+    can only be set once.
+
+    Returns:
+        bool: True if the process is now per-monitor DPI aware
+    """
+    try:
+        return ctypes.windll.shcore.SetProcessDpiAwareness(PROCESS_PER_MONITOR_DPI_AWARE) == 0
+    except (AttributeError, OSError):
+        pass
+    try:
+        # Before Windows 8.1, only the scale of the primary monitor is known
+        ctypes.windll.user32.SetProcessDPIAware()
+    except AttributeError:
+        # Not on Windows
+        pass
+    return False
+
+
+class FocusProvider:
+    """Base class for the backends reporting the foreground window."""
+
+    def foreground_window(self) -> Tuple[int, str]:
+        """Returns the handle and title of the foreground window."""
+        raise NotImplementedError
+
+    def find_window(self, title: str) -> int:
+        """Returns the handle of the first window with this title, or 0."""
+        return 0
+
+    def find_windows(self, title: str) -> List[GameWindow]:
+        """Returns every visible window with this title."""
+        return []
+
+    def window_rect(self, hwnd: int) -> Optional[Tuple[int, int, int, int]]:
+        """Returns the client area of a window in screen coordinates, or None if it is not shown."""
+        return None
+
+    def dpi_scale(self, hwnd: int) -> float:
+        """Returns the display scale of the monitor showing a window."""
+        return 1.0
+
+    def subscribe(self, callback: FocusCallback) -> bool:
+        """
+        Registers a callback fired on every foreground window change.
+
+        Returns:
+            bool: False if the backend has no change events and must be polled
+        """
+        return False
+
+    def unsubscribe(self):
+        """Stops the change events started by subscribe."""
+
+
+class Win32FocusProvider(FocusProvider):
+    """Backend using the Windows API and a foreground WinEvent hook."""
+
+    def __init__(self):
+        """Imports the Windows backends only when the provider is used."""
+        import win32gui # type: ignore
+        self._win32gui = win32gui
+        self._callback = None
+        self._hook_thread = None
+        self._hook_thread_id = 0
+        self._hook_installed = False
+
+    def foreground_window(self):
+        """Queries the foreground window."""
+        hwnd = self._win32gui.GetForegroundWindow()
+        return hwnd, self._win32gui.GetWindowText(hwnd) if hwnd else ""
+
+    def find_window(self, title):
+        """Looks the window up by its title."""
+        return self._win32gui.FindWindow(None, title)
+
+    def find_windows(self, title):
+        """Enumerates the top-level windows, keeping the visible ones with this title."""
+        win32gui = self._win32gui
+        windows = []
+
+        def on_window(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd) == title:
+                rect = self.window_rect(hwnd)
+                if rect:
+                    windows.append(GameWindow(hwnd, title, rect))
+            return True
+
+        win32gui.EnumWindows(on_window, None)
+        return windows
+
+    def window_rect(self, hwnd):
+        """Reads the client area, placed in the virtual screen spanning every monitor."""
+        win32gui = self._win32gui
+        try:
+            if not hwnd or win32gui.IsIconic(hwnd):
+                return None
+            _, _, width, height = win32gui.GetClientRect(hwnd)
+            left, top = win32gui.ClientToScreen(hwnd, (0, 0))
+        except win32gui.error:
+            # The window was closed
+            return None
+        if not width or not height:
+            return None
+        return left, top, left + width, top + height
+
+    def dpi_scale(self, hwnd):
+        """Reads the DPI of the monitor showing the window (Windows 10 and later)."""
+        try:
+            dpi = ctypes.windll.user32.GetDpiForWindow(hwnd)
+        except AttributeError:
+            return 1.0
+        return dpi / USER_DEFAULT_SCREEN_DPI if dpi else 1.0
+
+    def subscribe(self, callback):
+        """Starts a thread pumping EVENT_SYSTEM_FOREGROUND notifications, once its hook is installed."""
+        self._callback = callback
+        ready = Event()
+        self._hook_thread = Thread(target=self._pump_events, args=(ready,), daemon=True)
+        self._hook_thread.start()
+        ready.wait()
+        return self._hook_installed
+
+    def unsubscribe(self):
+        """Ends the message loop of the hook thread."""
+        if self._hook_thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._hook_thread_id, WM_QUIT, 0, 0)
+            self._hook_thread_id = 0
+
+    def _pump_events(self, ready: Event):
+        """Installs the WinEvent hook, reports the result through ready, and runs its message loop."""
+        try:
+            hook = self._install_hook()
+        finally:
+            ready.set()
+        if not hook:
+            print("Failed to install the focus hook, falling back to polling")
+            return
+
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+
+    def _install_hook(self) -> int:
+        """Installs the WinEvent hook on the calling thread and returns its handle, 0 on failure."""
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        win_event_proc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread, time):
+            if self._callback and hwnd:
+                self._callback(hwnd, self._win32gui.GetWindowText(hwnd))
+
+        # Keep a reference so the callback is not garbage collected
+        self._win_event_proc = win_event_proc(on_event)
+        self._hook_thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        hook = user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND,
+                                      0, self._win_event_proc, 0, 0, WINEVENT_OUTOFCONTEXT)
+        self._hook_installed = bool(hook)
+        if not hook:
+            # No message loop to stop
+            self._hook_thread_id = 0
+        return hook
+
+
+class FrameSourceFocusProvider(FocusProvider):
+    """Backend reading the window titles of a frame source, e.g. a replay."""
+
+    def __init__(self, frame_source):
+        """Initializes the provider from the frame source to follow."""
+        self.frame_source = frame_source
+
+    def foreground_window(self):
+        """Returns the title reported by the frame source."""
+        return 0, self.frame_source.active_window_title()
+
+
+class FakeFocusProvider(FocusProvider):
+    """In-memory backend whose foreground window is changed by the caller."""
+
+    def __init__(self, title: str = "", hwnd: int = 0, events: bool = True):
+        """
+        Initializes the fake foreground window.
+
+        Args:
+            title: Title of the initial foreground window
+            hwnd: Handle of the initial foreground window
+            events: If False, the provider must be polled like a backend without hooks
+        """
+        self.hwnd = hwnd
+        self.title = title
+        self.windows: Dict[str, int] = {title: hwnd} if title else {}
+        self.rects: Dict[int, GameWindow] = {}
+        self.events = events
+        self.queries = 0
+        self._callback = None
+
+    def set_foreground(self, hwnd: int, title: str):
+        """Brings a window to the foreground and fires the change event."""
+        self.hwnd, self.title = hwnd, title
+        self.windows.setdefault(title, hwnd)
+        if self._callback:
+            self._callback(hwnd, title)
+
+    def foreground_window(self):
+        """Returns the fake foreground window."""
+        self.queries += 1
+        return self.hwnd, self.title
+
+    def add_window(self, hwnd: int, title: str, rect: Tuple[int, int, int, int]):
+        """Places a fake window on the screen, without bringing it to the foreground."""
+        self.windows.setdefault(title, hwnd)
+        self.rects[hwnd] = GameWindow(hwnd, title, rect)
+
+    def find_window(self, title):
+        """Looks the window up among the fake windows seen so far."""
+        self.queries += 1
+        return self.windows.get(title, 0)
+
+    def find_windows(self, title):
+        """Returns the fake windows placed with this title."""
+        self.queries += 1
+        return [window for window in self.rects.values() if window.title == title]
+
+    def window_rect(self, hwnd):
+        """Returns where the fake window was placed."""
+        self.queries += 1
+        window = self.rects.get(hwnd)
+        return window.rect if window else None
+
+    def subscribe(self, callback):
+        """Registers the callback if events are enabled."""
+        if not self.events:
+            return False
+        self._callback = callback
+        return True
+
+    def unsubscribe(self):
+        """Drops the registered callback."""
+        self._callback = None
+
+
+class WindowFocusTracker:
+    """Keeps a cached view of whether the game window is in the foreground."""
+
+    def __init__(self, provider: FocusProvider, title: str = GAME_WINDOW_TITLE,
+                 ttl: Optional[float] = None, hwnd: int = 0):
+        """
+        Initializes the tracker and subscribes to focus change events.
+
+        Args:
+            provider: Backend reporting the foreground window
+            title: Title of the game window
+            ttl: Seconds before the cached state is refreshed by polling; by default
+                 short when the provider has no events and long as a safety net otherwise
+            hwnd: Handle of the game window to follow, when several share its title
+        """
+        self.provider = provider
+        self.title = title
+        self.window = hwnd
+        self.is_focused = False
+        self.handle = hwnd
+        self.refreshes = 0
+        self._lock = Lock()
+        self.events_enabled = provider.subscribe(self._on_focus_change)
+        if ttl is None:
+            ttl = FOCUS_EVENT_TTL if self.events_enabled else FOCUS_POLL_TTL
+        self.ttl = ttl
+        self.refresh()
+
+    def _on_focus_change(self, hwnd: int, title: str):
+        """Updates the cached state from a focus change event."""
+        with self._lock:
+            self._apply(hwnd, title)
+
+    def _apply(self, hwnd: int, title: str):
+        """Stores the focus state for a foreground window."""
+        self.is_focused = title == self.title and (not self.window or hwnd == self.window)
+        if self.is_focused and hwnd:
+            self.handle = hwnd
+        self.last_refresh = perf_counter()
+
+    def refresh(self):
+        """Queries the provider for the foreground window."""
+        hwnd, title = self.provider.foreground_window()
+        with self._lock:
+            self.refreshes += 1
+            self._apply(hwnd, title)
+
+    def focused(self) -> bool:
+        """Returns the cached focus state, polling only once the TTL has expired."""
+        if perf_counter() - self.last_refresh >= self.ttl:
+            self.refresh()
+        return self.is_focused
+
+    def window_handle(self) -> int:
+        """Returns the game window handle, looking it up only if it was never seen."""
+        if not self.handle:
+            self.handle = self.provider.find_window(self.title)
+        return self.handle
+
+    def window_rect(self) -> Optional[Tuple[int, int, int, int]]:
+        """Returns the client area of the game window in screen coordinates, or None."""
+        hwnd = self.window_handle()
+        rect = self.provider.window_rect(hwnd) if hwnd else None
+        if rect is None and hwnd and not self.window:
+            # The window may have been closed and reopened with a new handle
+            self.handle = 0
+        return rect
+
+    def dpi_scale(self) -> float:
+        """Returns the display scale of the monitor showing the game window."""
+        return self.provider.dpi_scale(self.handle) if self.handle else 1.0
+
+    def close(self):
+        """Stops listening for focus change events."""
+        self.provider.unsubscribe()